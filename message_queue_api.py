@@ -6,8 +6,9 @@ Serves as an intermediary between the front-end and SOL VM
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import json
+import orjson
 import time
 import os
 import sqlite3
@@ -16,7 +17,17 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import base64
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (C-accelerated encode/decode)"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 # Configuration
@@ -25,15 +36,95 @@ API_KEY = os.environ.get('API_KEY', 'your-secret-api-key')
 MAX_TASK_AGE_HOURS = int(os.environ.get('MAX_TASK_AGE_HOURS', '24'))
 CLEANUP_INTERVAL_MINUTES = int(os.environ.get('CLEANUP_INTERVAL_MINUTES', '60'))
 
+# Result statuses after which a stored result never changes
+FINAL_RESULT_STATUSES = ('completed', 'failed', 'timeout')
+
+# SQL statements are kept as module-level constants so every call passes the
+# exact same string and hits the connection's prepared-statement cache
+_SQL_INSERT_TASK = '''
+    INSERT INTO tasks (id, code, timeout, timestamp, priority, client_id, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_SELECT_NEXT_TASK = '''
+    SELECT id, code, timeout, timestamp, priority, client_id
+    FROM tasks 
+    WHERE status = 'pending'
+    ORDER BY priority DESC, created_at ASC
+    LIMIT 1
+'''
+_SQL_ASSIGN_TASK = '''
+    UPDATE tasks 
+    SET status = 'assigned', vm_id = ?, assigned_at = ?
+    WHERE id = ? AND status = 'pending'
+'''
+_SQL_UPSERT_VM_STATUS = '''
+    INSERT OR REPLACE INTO vm_status (vm_id, last_seen, status)
+    VALUES (?, ?, 'active')
+'''
+_SQL_UPDATE_TASK_STATUS_VM = 'UPDATE tasks SET status = ?, vm_id = ? WHERE id = ?'
+_SQL_UPDATE_TASK_STATUS = 'UPDATE tasks SET status = ? WHERE id = ?'
+_SQL_INSERT_RESULT = '''
+    INSERT OR REPLACE INTO results 
+    (id, task_id, success, output, error, execution_time, timestamp, 
+     code, status, vm_id, vm_info, system_metrics, benchmarks)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_SELECT_RESULT = 'SELECT * FROM results WHERE task_id = ?'
+_SQL_SELECT_RESULT_SUMMARY = '''
+    SELECT id, success, execution_time, timestamp, status, vm_id,
+           json_extract(vm_info, '$.hostname'),
+           json_extract(vm_info, '$.python_version'),
+           json_extract(system_metrics, '$.cpu.usage'),
+           json_extract(system_metrics, '$.memory.usage_percent'),
+           json_extract(system_metrics, '$.gpu.name'),
+           json_extract(system_metrics, '$.gpu.usage')
+    FROM results WHERE task_id = ?
+'''
+_SQL_COUNT_TASKS_BY_STATUS = 'SELECT status, COUNT(*) FROM tasks GROUP BY status'
+_SQL_COUNT_ACTIVE_VMS = 'SELECT COUNT(*) FROM vm_status WHERE last_seen > ?'
+_SQL_AVG_EXECUTION_TIME = 'SELECT AVG(execution_time) FROM results WHERE execution_time > 0'
+_SQL_AVG_CPU_USAGE = '''
+    SELECT AVG(json_extract(system_metrics, '$.cpu.usage')) FROM results
+    WHERE json_valid(system_metrics)
+'''
+_SQL_DELETE_OLD_RESULTS = '''
+    DELETE FROM results WHERE task_id IN (
+        SELECT id FROM tasks 
+        WHERE status IN ('completed', 'failed', 'timeout') 
+        AND created_at < ?
+    )
+'''
+_SQL_DELETE_OLD_TASKS = '''
+    DELETE FROM tasks 
+    WHERE status IN ('completed', 'failed', 'timeout') 
+    AND created_at < ?
+'''
+_SQL_DELETE_OLD_VMS = 'DELETE FROM vm_status WHERE last_seen < ?'
+
 class MessageQueueDB:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._local = threading.local()
         self.init_database()
+    
+    def _get_cursor(self) -> sqlite3.Cursor:
+        """Get this thread's persistent cursor, opening the connection on first use"""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+            self._local.cursor = cursor = conn.cursor()
+        return cursor
+    
+    def _rollback(self):
+        """Discard a half-finished transaction on this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.rollback()
         
     def init_database(self):
         """Initialize the database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._get_cursor()
         
         # Tasks table
         cursor.execute('''
@@ -89,19 +180,14 @@ class MessageQueueDB:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_task_id ON results (task_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_vm_last_seen ON vm_status (last_seen)')
         
-        conn.commit()
-        conn.close()
+        cursor.connection.commit()
     
     def add_task(self, task: Dict[str, Any]) -> bool:
         """Add a new task to the queue"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
-            cursor.execute('''
-                INSERT INTO tasks (id, code, timeout, timestamp, priority, client_id, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            cursor.execute(_SQL_INSERT_TASK, (
                 task['id'],
                 task['code'],
                 task['timeout'],
@@ -111,50 +197,34 @@ class MessageQueueDB:
                 'pending'
             ))
             
-            conn.commit()
-            conn.close()
+            cursor.connection.commit()
             return True
         except Exception as e:
+            self._rollback()
             print(f"Error adding task: {e}")
             return False
     
     def get_next_task(self, vm_id: str) -> Optional[Dict[str, Any]]:
         """Get the next pending task for a VM"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
             # Get the highest priority pending task
-            cursor.execute('''
-                SELECT id, code, timeout, timestamp, priority, client_id
-                FROM tasks 
-                WHERE status = 'pending'
-                ORDER BY priority DESC, created_at ASC
-                LIMIT 1
-            ''')
+            cursor.execute(_SQL_SELECT_NEXT_TASK)
             
             row = cursor.fetchone()
             if not row:
-                conn.close()
                 return None
             
             task_id = row[0]
             
             # Mark task as assigned to this VM
-            cursor.execute('''
-                UPDATE tasks 
-                SET status = 'assigned', vm_id = ?, assigned_at = ?
-                WHERE id = ? AND status = 'pending'
-            ''', (vm_id, datetime.now().isoformat(), task_id))
+            cursor.execute(_SQL_ASSIGN_TASK, (vm_id, datetime.now().isoformat(), task_id))
             
             # Update VM status
-            cursor.execute('''
-                INSERT OR REPLACE INTO vm_status (vm_id, last_seen, status)
-                VALUES (?, ?, 'active')
-            ''', (vm_id, datetime.now().isoformat()))
+            cursor.execute(_SQL_UPSERT_VM_STATUS, (vm_id, datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
+            cursor.connection.commit()
             
             # Return task if successfully assigned
             if cursor.rowcount > 0:
@@ -170,43 +240,33 @@ class MessageQueueDB:
             return None
             
         except Exception as e:
+            self._rollback()
             print(f"Error getting next task: {e}")
             return None
     
     def update_task_status(self, task_id: str, status: str, vm_id: str = None) -> bool:
         """Update task status"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
             if vm_id:
-                cursor.execute('''
-                    UPDATE tasks SET status = ?, vm_id = ? WHERE id = ?
-                ''', (status, vm_id, task_id))
+                cursor.execute(_SQL_UPDATE_TASK_STATUS_VM, (status, vm_id, task_id))
             else:
-                cursor.execute('''
-                    UPDATE tasks SET status = ? WHERE id = ?
-                ''', (status, task_id))
+                cursor.execute(_SQL_UPDATE_TASK_STATUS, (status, task_id))
             
-            conn.commit()
-            conn.close()
+            cursor.connection.commit()
             return cursor.rowcount > 0
         except Exception as e:
+            self._rollback()
             print(f"Error updating task status: {e}")
             return False
     
     def add_result(self, result: Dict[str, Any]) -> bool:
         """Add execution result"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO results 
-                (id, task_id, success, output, error, execution_time, timestamp, 
-                 code, status, vm_id, vm_info, system_metrics, benchmarks)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            cursor = self._get_cursor()
+            
+            cursor.execute(_SQL_INSERT_RESULT, (
                 result['id'],
                 result['id'],  # task_id same as result id
                 result['success'],
@@ -217,35 +277,29 @@ class MessageQueueDB:
                 result.get('code', ''),
                 result['status'],
                 result.get('vm_id'),
-                json.dumps(result.get('vm_info', {})),
-                json.dumps(result.get('system_metrics', {})),
-                json.dumps(result.get('benchmarks', {}))
+                orjson.dumps(result.get('vm_info', {})).decode('utf-8'),
+                orjson.dumps(result.get('system_metrics', {})).decode('utf-8'),
+                orjson.dumps(result.get('benchmarks', {})).decode('utf-8')
             ))
             
             # Update task status
-            cursor.execute('''
-                UPDATE tasks SET status = ? WHERE id = ?
-            ''', (result['status'], result['id']))
+            cursor.execute(_SQL_UPDATE_TASK_STATUS, (result['status'], result['id']))
             
-            conn.commit()
-            conn.close()
+            cursor.connection.commit()
             return True
         except Exception as e:
+            self._rollback()
             print(f"Error adding result: {e}")
             return False
     
     def get_result(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get execution result by task ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
-            cursor.execute('''
-                SELECT * FROM results WHERE task_id = ?
-            ''', (task_id,))
+            cursor.execute(_SQL_SELECT_RESULT, (task_id,))
             
             row = cursor.fetchone()
-            conn.close()
             
             if not row:
                 return None
@@ -260,34 +314,67 @@ class MessageQueueDB:
                 'code': row[7],
                 'status': row[8],
                 'vm_id': row[9],
-                'vm_info': json.loads(row[10]) if row[10] else {},
-                'system_metrics': json.loads(row[11]) if row[11] else {},
-                'benchmarks': json.loads(row[12]) if row[12] else {}
+                'vm_info': orjson.loads(row[10]) if row[10] else {},
+                'system_metrics': orjson.loads(row[11]) if row[11] else {},
+                'benchmarks': orjson.loads(row[12]) if row[12] else {}
             }
         except Exception as e:
             print(f"Error getting result: {e}")
             return None
     
+    def get_result_summary(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a lightweight result summary without parsing the JSON blob columns"""
+        try:
+            cursor = self._get_cursor()
+            
+            # json_extract pulls single fields out of the stored JSON text inside
+            # SQLite, so the full vm_info/system_metrics/benchmarks are never parsed
+            cursor.execute(_SQL_SELECT_RESULT_SUMMARY, (task_id,))
+            
+            row = cursor.fetchone()
+            
+            if not row:
+                return None
+            
+            return {
+                'id': row[0],
+                'success': bool(row[1]),
+                'execution_time': row[2],
+                'timestamp': row[3],
+                'status': row[4],
+                'vm_id': row[5],
+                'hostname': row[6],
+                'python_version': row[7],
+                'cpu_usage': row[8],
+                'memory_usage_percent': row[9],
+                'gpu_name': row[10],
+                'gpu_usage': row[11]
+            }
+        except Exception as e:
+            print(f"Error getting result summary: {e}")
+            return None
+    
     def get_queue_stats(self) -> Dict[str, Any]:
         """Get queue statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
             # Count tasks by status
-            cursor.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status')
+            cursor.execute(_SQL_COUNT_TASKS_BY_STATUS)
             task_counts = dict(cursor.fetchall())
             
             # Count active VMs (seen in last 5 minutes)
             five_minutes_ago = (datetime.now() - timedelta(minutes=5)).isoformat()
-            cursor.execute('SELECT COUNT(*) FROM vm_status WHERE last_seen > ?', (five_minutes_ago,))
+            cursor.execute(_SQL_COUNT_ACTIVE_VMS, (five_minutes_ago,))
             active_vms = cursor.fetchone()[0]
             
             # Average execution time
-            cursor.execute('SELECT AVG(execution_time) FROM results WHERE execution_time > 0')
+            cursor.execute(_SQL_AVG_EXECUTION_TIME)
             avg_execution_time = cursor.fetchone()[0] or 0
             
-            conn.close()
+            # Average CPU usage reported by VMs, read straight from the JSON column
+            cursor.execute(_SQL_AVG_CPU_USAGE)
+            avg_cpu_usage = cursor.fetchone()[0] or 0
             
             return {
                 'pending_tasks': task_counts.get('pending', 0),
@@ -296,7 +383,8 @@ class MessageQueueDB:
                 'completed_tasks': task_counts.get('completed', 0),
                 'failed_tasks': task_counts.get('failed', 0),
                 'active_vms': active_vms,
-                'avg_execution_time': round(avg_execution_time, 2)
+                'avg_execution_time': round(avg_execution_time, 2),
+                'avg_cpu_usage': round(avg_cpu_usage, 2)
             }
         except Exception as e:
             print(f"Error getting queue stats: {e}")
@@ -307,34 +395,22 @@ class MessageQueueDB:
         try:
             cutoff_time = (datetime.now() - timedelta(hours=MAX_TASK_AGE_HOURS)).isoformat()
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_cursor()
             
             # Delete old completed/failed tasks and their results
-            cursor.execute('''
-                DELETE FROM results WHERE task_id IN (
-                    SELECT id FROM tasks 
-                    WHERE status IN ('completed', 'failed', 'timeout') 
-                    AND created_at < ?
-                )
-            ''', (cutoff_time,))
-            
-            cursor.execute('''
-                DELETE FROM tasks 
-                WHERE status IN ('completed', 'failed', 'timeout') 
-                AND created_at < ?
-            ''', (cutoff_time,))
+            cursor.execute(_SQL_DELETE_OLD_RESULTS, (cutoff_time,))
+            cursor.execute(_SQL_DELETE_OLD_TASKS, (cutoff_time,))
             
             # Clean up old VM status
             old_vm_cutoff = (datetime.now() - timedelta(hours=1)).isoformat()
-            cursor.execute('DELETE FROM vm_status WHERE last_seen < ?', (old_vm_cutoff,))
+            cursor.execute(_SQL_DELETE_OLD_VMS, (old_vm_cutoff,))
             
-            conn.commit()
-            conn.close()
+            cursor.connection.commit()
             
             print(f"Cleaned up old data (cutoff: {cutoff_time})")
             
         except Exception as e:
+            self._rollback()
             print(f"Error cleaning up old data: {e}")
 
 # Global database instance
@@ -458,16 +534,26 @@ def get_result(task_id):
     result = db.get_result(task_id)
     
     if result:
+        # Finished results are immutable, so let pollers revalidate with
+        # If-None-Match and skip re-downloading the body (and GIF payload)
+        etag = None
+        if result['status'] in FINAL_RESULT_STATUSES:
+            etag = f"{task_id}-{result['status']}"
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+        
         # --- GIF bytestream injection logic ---
         # Try to parse GIF_OUTPUT from result['output']
         output = result.get('output', '')
         gif_bytes = None
         gif_filename = None
-        import re, json as _json
+        import re
         match = re.search(r'GIF_OUTPUT:(\{.*?\})(?:\n|$)', output)
         if match:
             try:
-                gif_info = _json.loads(match.group(1))
+                gif_info = orjson.loads(match.group(1))
                 gif_filename = gif_info.get('gif_filename') or gif_info.get('gif_file')
                 if gif_filename and os.path.exists(gif_filename):
                     with open(gif_filename, 'rb') as f:
@@ -481,7 +567,23 @@ def get_result(task_id):
                     result['video_data'] = gif_info
             except Exception as e:
                 print(f"Failed to parse GIF_OUTPUT or read GIF file: {e}")
-        return jsonify(result)
+        response = jsonify(result)
+        if etag:
+            response.set_etag(etag)
+        return response
+    else:
+        return jsonify({'error': 'Result not found'}), 404
+
+@app.route('/results/<task_id>/summary', methods=['GET'])
+def get_result_summary(task_id):
+    """Get execution result summary (no output, code or JSON blobs)"""
+    if not verify_api_key(request):
+        return jsonify({'error': 'Invalid API key'}), 401
+    
+    summary = db.get_result_summary(task_id)
+    
+    if summary:
+        return jsonify(summary)
     else:
         return jsonify({'error': 'Result not found'}), 404
 
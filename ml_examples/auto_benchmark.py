@@ -7,7 +7,7 @@ performance metrics, system information, and resource utilization data.
 It monitors the execution environment and provides detailed analytics.
 """
 
-import json
+import orjson
 import time
 import psutil
 import subprocess
@@ -15,10 +15,106 @@ import platform
 import sys
 import os
 import threading
+import multiprocessing as mp
+import queue
+import struct
+import atexit
+import datetime
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 import numpy as np
 
+# orjson serializes dataclasses natively; this adds numpy arrays and scalars
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+# nvidia-smi query fields; rows are parsed by field name, not position
+GPU_QUERY_FIELDS = ('index', 'name', 'memory.total', 'memory.used', 'temperature.gpu', 'utilization.gpu')
+
+def parse_gpu_csv_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse one `nvidia-smi --query-gpu=GPU_QUERY_FIELDS` CSV row"""
+    parts = [p.strip() for p in line.split(',')]
+    if len(parts) != len(GPU_QUERY_FIELDS):
+        return None
+    fields = dict(zip(GPU_QUERY_FIELDS, parts))
+    
+    def as_int(key: str) -> int:
+        value = fields[key]
+        return int(value) if value.isdigit() else 0
+    
+    return {
+        'id': as_int('index'),
+        'name': fields['name'],
+        'memory_total_mb': as_int('memory.total'),
+        'memory_used_mb': as_int('memory.used'),
+        'temperature': as_int('temperature.gpu'),
+        'utilization_percent': as_int('utilization.gpu')
+    }
+
+# Per-sample scalar columns, stored column-wise (one contiguous row per column)
+SAMPLE_COLUMNS = ('cpu_percent', 'memory_percent', 'memory_used_gb',
+                  'disk_read_mb_per_s', 'disk_write_mb_per_s',
+                  'net_sent_mb_per_s', 'net_recv_mb_per_s')
+COL_CPU = SAMPLE_COLUMNS.index('cpu_percent')
+COL_MEMORY_USED = SAMPLE_COLUMNS.index('memory_used_gb')
+
+# Per-sample, per-GPU columns
+GPU_SAMPLE_COLUMNS = ('utilization', 'memory_used', 'temperature')
+GPU_COL_UTILIZATION = GPU_SAMPLE_COLUMNS.index('utilization')
+
+# Ring buffer size for the sample history (power of two, ~1.8 h at 0.1 s)
+HISTORY_CAPACITY = 1 << 16
+
+# Adaptive sampling: after ADAPTIVE_STEADY_TICKS ticks whose smoothed CPU/GPU
+# utilization change stays under ADAPTIVE_STEADY_DELTA points, the interval
+# doubles (up to ADAPTIVE_MAX_INTERVAL); any jump above ADAPTIVE_SPIKE_DELTA
+# snaps it back to the configured interval
+ADAPTIVE_MAX_INTERVAL = 1.0
+ADAPTIVE_STEADY_DELTA = 1.0
+ADAPTIVE_STEADY_TICKS = 10
+ADAPTIVE_SPIKE_DELTA = 10.0
+ADAPTIVE_EWMA_ALPHA = 0.1
+
+# Rating bin edges and labels, indexed by np.digitize(value, bins, right=True)
+CPU_RATING_BINS = np.array([50, 80])
+CPU_RATING_LABELS = ('Low Utilization', 'Moderate Utilization', 'High Utilization')
+MEMORY_RATING_BINS = np.array([50, 80])
+MEMORY_RATING_LABELS = ('Low Usage', 'Moderate Usage', 'High Usage')
+GPU_RATING_BINS = np.array([30, 70])
+GPU_RATING_LABELS = ('Low Utilization', 'Moderate Utilization', 'High Utilization')
+
+# Recommendation triggers over (cpu %, peak memory fraction, gpu %, execution time s)
+RECOMMENDATION_THRESHOLDS = np.array([90, 0.9, 20, 60])
+RECOMMENDATION_ABOVE = np.array([True, True, False, True])
+RECOMMENDATIONS = (
+    "Consider using more CPU cores or optimizing algorithms",
+    "Memory usage is very high - consider optimizing data structures",
+    "GPU utilization is low - verify WARP is using GPU acceleration",
+    "Long execution time - consider reducing problem size or optimizing",
+)
+
+# /proc files sampled every tick on Linux, instead of separate psutil calls
+PROC_FILES = {
+    'stat': '/proc/stat',
+    'meminfo': '/proc/meminfo',
+    'diskstats': '/proc/diskstats',
+    'net_dev': '/proc/net/dev'
+}
+
+def pack_sample(timestamp_ns: int, values, gpu_values) -> bytes:
+    """Pack one sample into an int64 timestamp plus flat float64 values for the monitor queue"""
+    flat_gpu = [v for row in gpu_values for v in row]
+    return struct.pack(f'=q{len(values) + len(flat_gpu)}d', timestamp_ns, *values, *flat_gpu)
+
+def unpack_sample(record: bytes):
+    """Inverse of pack_sample: timestamp, scalar values and a (num_gpus, GPU_SAMPLE_COLUMNS) array"""
+    timestamp_ns, = struct.unpack_from('=q', record)
+    flat = np.frombuffer(record, dtype=np.float64, offset=8)
+    return timestamp_ns, flat[:len(SAMPLE_COLUMNS)], flat[len(SAMPLE_COLUMNS):].reshape(-1, len(GPU_SAMPLE_COLUMNS))
+
+def format_timestamp_ns(timestamp_ns: int) -> str:
+    """Render a time.time_ns() reading as a local ISO-8601 string"""
+    return datetime.datetime.fromtimestamp(timestamp_ns / 1e9).isoformat(timespec='milliseconds')
+
 @dataclass
 class SystemInfo:
     """System information structure"""
@@ -42,6 +138,7 @@ class ResourceMetrics:
     gpu_utilization: List[Dict[str, float]]
     disk_io: Dict[str, float]
     network_io: Dict[str, float]
+    timestamp: str = ''
 
 @dataclass
 class BenchmarkResults:
@@ -55,41 +152,109 @@ class BenchmarkResults:
     resource_timeline: List[ResourceMetrics]
     process_stats: Dict[str, Any]
     warp_specific_metrics: Dict[str, Any]
+    monitor_stats: Dict[str, Any] = field(default_factory=dict)
 
 class AutoBenchmark:
     """Automatic benchmarking system for WARP simulations"""
     
-    def __init__(self, monitor_interval: float = 0.1):
+    def __init__(self, monitor_interval: float = 0.1, adaptive_interval: bool = True):
         self.monitor_interval = monitor_interval
+        self.adaptive_interval = adaptive_interval
         self.start_time = None
         self.end_time = None
-        self.resource_history = []
         self.monitoring = False
         self.monitor_thread = None
+        self.monitor_proc = None
+        self._sample_queue = None
+        self._stop_event = None
+        self.monitor_stats = {}
         self.process = None
+        self.reset_history()
         
+        # Previous disk/network byte counters, used to report per-interval rates
+        self._prev_io = None
+        self._prev_io_time = None
+        
+        # Cached /proc file descriptors (Linux), re-read with pread() per sample
+        self._proc_fds = {}
+        self._block_devices = set()
+        self._prev_cpu_times = None
+        
+        # Long-lived `nvidia-smi -lms` stream feeding the latest GPU readings
+        self._nvsmi = None
+        self._nvsmi_thread = None
+        self._latest_gpu = {}
+        self._latest_gpu_lock = threading.Lock()
+        
+        # Last GPU reading, shared by every caller within one sample interval
+        self._gpu_cache = None
+        self._gpu_cache_ts = 0.0
+        
+        # System fields that cannot change during a run, filled on first use
+        self._static_sysinfo = None
+        
+        # In-process NVML handles; None means fall back to nvidia-smi
+        self._nvml = None
+        self._nvml_handles = None
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            atexit.register(pynvml.nvmlShutdown)
+            self._nvml = pynvml
+            self._nvml_handles = [pynvml.nvmlDeviceGetHandleByIndex(i)
+                                  for i in range(pynvml.nvmlDeviceGetCount())]
+        except Exception:
+            self._nvml = None
+            self._nvml_handles = None
+        
+    def get_nvml_gpu_info(self) -> List[Dict[str, Any]]:
+        """Get GPU information through NVML without spawning nvidia-smi"""
+        nvml = self._nvml
+        gpu_info = []
+        for i, handle in enumerate(self._nvml_handles):
+            name = nvml.nvmlDeviceGetName(handle)
+            memory = nvml.nvmlDeviceGetMemoryInfo(handle)
+            gpu_info.append({
+                'id': i,
+                'name': name.decode() if isinstance(name, bytes) else name,
+                'memory_total_mb': memory.total >> 20,
+                'memory_used_mb': memory.used >> 20,
+                'temperature': nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU),
+                'utilization_percent': nvml.nvmlDeviceGetUtilizationRates(handle).gpu
+            })
+        return gpu_info
+    
     def get_gpu_info(self) -> List[Dict[str, Any]]:
-        """Get GPU information using nvidia-smi"""
+        """Get GPU information, reusing a reading taken within the current sample interval"""
+        now = time.monotonic()
+        if self._gpu_cache is not None and now - self._gpu_cache_ts < self.monitor_interval * 0.9:
+            return self._gpu_cache
+        
+        self._gpu_cache = self.query_gpu_info()
+        self._gpu_cache_ts = now
+        return self._gpu_cache
+    
+    def query_gpu_info(self) -> List[Dict[str, Any]]:
+        """Query GPU information using NVML, or nvidia-smi when NVML is unavailable"""
+        if self._nvml_handles is not None:
+            try:
+                return self.get_nvml_gpu_info()
+            except Exception as e:
+                print(f"Warning: NVML query failed, using nvidia-smi: {e}")
+        
         try:
             result = subprocess.run([
-                'nvidia-smi', '--query-gpu=name,memory.total,memory.used,temperature.gpu,utilization.gpu',
+                'nvidia-smi', f"--query-gpu={','.join(GPU_QUERY_FIELDS)}",
                 '--format=csv,noheader,nounits'
             ], capture_output=True, text=True, timeout=10)
             
             if result.returncode == 0:
                 gpu_info = []
-                for i, line in enumerate(result.stdout.strip().split('\n')):
+                for line in result.stdout.strip().split('\n'):
                     if line.strip():
-                        parts = [p.strip() for p in line.split(',')]
-                        if len(parts) >= 5:
-                            gpu_info.append({
-                                'id': i,
-                                'name': parts[0],
-                                'memory_total_mb': int(parts[1]) if parts[1].isdigit() else 0,
-                                'memory_used_mb': int(parts[2]) if parts[2].isdigit() else 0,
-                                'temperature': int(parts[3]) if parts[3].isdigit() else 0,
-                                'utilization_percent': int(parts[4]) if parts[4].isdigit() else 0
-                            })
+                        gpu = parse_gpu_csv_line(line)
+                        if gpu:
+                            gpu_info.append(gpu)
                 return gpu_info
         except Exception as e:
             print(f"Warning: Could not get GPU info: {e}")
@@ -97,6 +262,59 @@ class AutoBenchmark:
         return [{'id': 0, 'name': 'Unknown', 'memory_total_mb': 0, 'memory_used_mb': 0, 
                 'temperature': 0, 'utilization_percent': 0}]
     
+    def start_gpu_stream(self):
+        """Start a single `nvidia-smi -lms` process that keeps emitting GPU readings"""
+        if self._nvml_handles is not None:
+            return  # NVML reads are cheap enough to do per sample
+        
+        with self._latest_gpu_lock:
+            self._latest_gpu = {gpu['id']: gpu for gpu in self.query_gpu_info()}
+        
+        try:
+            self._nvsmi = subprocess.Popen([
+                'nvidia-smi', f"--query-gpu={','.join(GPU_QUERY_FIELDS)}",
+                '--format=csv,noheader,nounits',
+                '-lms', str(max(1, int(self.monitor_interval * 1000)))
+            ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except (FileNotFoundError, OSError) as e:
+            print(f"Warning: Could not start nvidia-smi stream: {e}")
+            self._nvsmi = None
+            return
+        
+        self._nvsmi_thread = threading.Thread(target=self.read_gpu_stream, daemon=True)
+        self._nvsmi_thread.start()
+    
+    def read_gpu_stream(self):
+        """Background thread reading one CSV row per GPU from the nvidia-smi stream"""
+        for line in self._nvsmi.stdout:
+            gpu = parse_gpu_csv_line(line)
+            if gpu:
+                with self._latest_gpu_lock:
+                    self._latest_gpu[gpu['id']] = gpu
+    
+    def stop_gpu_stream(self):
+        """Terminate the nvidia-smi stream"""
+        if self._nvsmi:
+            self._nvsmi.terminate()
+            try:
+                self._nvsmi.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self._nvsmi.kill()
+            self._nvsmi = None
+        if self._nvsmi_thread:
+            self._nvsmi_thread.join(timeout=2.0)
+            self._nvsmi_thread = None
+    
+    def get_latest_gpu_info(self) -> List[Dict[str, Any]]:
+        """Latest GPU readings from the stream, falling back to a direct query"""
+        if self._nvsmi is None:
+            return self.get_gpu_info()
+        with self._latest_gpu_lock:
+            gpu_info = [self._latest_gpu[i] for i in sorted(self._latest_gpu)]
+        self._gpu_cache = gpu_info
+        self._gpu_cache_ts = time.monotonic()
+        return gpu_info
+    
     def get_warp_version(self) -> str:
         """Get WARP version if available"""
         try:
@@ -105,76 +323,289 @@ class AutoBenchmark:
         except ImportError:
             return 'not_installed'
     
-    def get_system_info(self) -> SystemInfo:
+    def get_static_system_info(self) -> Dict[str, Any]:
+        """Introspect the fixed system fields once; later calls reuse the result"""
+        if self._static_sysinfo is None:
+            self._static_sysinfo = {
+                'cpu_model': platform.processor() or 'Unknown',
+                'cpu_cores': psutil.cpu_count(logical=False),
+                'cpu_threads': psutil.cpu_count(logical=True),
+                'total_memory_gb': psutil.virtual_memory().total / (1024**3),
+                'platform': f"{platform.system()} {platform.release()}",
+                'python_version': platform.python_version(),
+                'warp_version': self.get_warp_version()
+            }
+        return self._static_sysinfo
+    
+    def get_system_info(self, gpu_info: Optional[List[Dict[str, Any]]] = None) -> SystemInfo:
         """Collect comprehensive system information"""
-        memory = psutil.virtual_memory()
-        
         return SystemInfo(
-            cpu_model=platform.processor() or 'Unknown',
-            cpu_cores=psutil.cpu_count(logical=False),
-            cpu_threads=psutil.cpu_count(logical=True),
-            total_memory_gb=memory.total / (1024**3),
-            available_memory_gb=memory.available / (1024**3),
-            gpu_info=self.get_gpu_info(),
-            platform=f"{platform.system()} {platform.release()}",
-            python_version=platform.python_version(),
-            warp_version=self.get_warp_version(),
+            **self.get_static_system_info(),
+            available_memory_gb=psutil.virtual_memory().available / (1024**3),
+            gpu_info=gpu_info if gpu_info is not None else self.get_gpu_info(),
             timestamp=time.strftime('%Y-%m-%d %H:%M:%S')
         )
     
-    def get_current_resources(self) -> ResourceMetrics:
-        """Get current resource utilization"""
+    def open_proc_files(self):
+        """Open the /proc files read on every sample once, for pread() reuse (Linux only)"""
+        if platform.system() != 'Linux':
+            return
+        try:
+            for name, path in PROC_FILES.items():
+                self._proc_fds[name] = os.open(path, os.O_RDONLY)
+            # Whole-disk devices only, like psutil: partitions would double count
+            self._block_devices = {name.encode() for name in os.listdir('/sys/block')}
+        except OSError:
+            self.close_proc_files()
+    
+    def close_proc_files(self):
+        """Close the cached /proc file descriptors"""
+        for fd in self._proc_fds.values():
+            os.close(fd)
+        self._proc_fds = {}
+    
+    def read_proc_counters(self):
+        """Parse CPU, memory, disk and network counters from the cached /proc fds"""
+        fds = self._proc_fds
+        
+        # Aggregate "cpu" line of /proc/stat: busy share of jiffies since last read
+        cpu_line = os.pread(fds['stat'], 512, 0).split(b'\n', 1)[0]
+        times = [int(v) for v in cpu_line.split()[1:9]]
+        cpu_total = sum(times)
+        cpu_idle = times[3] + times[4]  # idle + iowait
+        prev_total, prev_idle = self._prev_cpu_times or (cpu_total, cpu_idle)
+        self._prev_cpu_times = (cpu_total, cpu_idle)
+        elapsed = cpu_total - prev_total
+        cpu_percent = 100.0 * (elapsed - (cpu_idle - prev_idle)) / elapsed if elapsed > 0 else 0.0
+        
+        meminfo = {}
+        for line in os.pread(fds['meminfo'], 8192, 0).split(b'\n'):
+            key, _, rest = line.partition(b':')
+            if rest:
+                meminfo[key] = int(rest.split()[0]) * 1024
+        mem_total = meminfo[b'MemTotal']
+        mem_used = mem_total - meminfo.get(b'MemAvailable', meminfo[b'MemFree'])
+        
+        disk_read = disk_write = 0
+        for line in os.pread(fds['diskstats'], 1 << 16, 0).split(b'\n'):
+            fields = line.split()
+            if len(fields) >= 10 and fields[2] in self._block_devices:
+                disk_read += int(fields[5]) * 512  # sectors read
+                disk_write += int(fields[9]) * 512  # sectors written
+        
+        net_sent = net_recv = 0
+        for line in os.pread(fds['net_dev'], 1 << 16, 0).split(b'\n')[2:]:
+            _, sep, rest = line.partition(b':')
+            if sep:
+                fields = rest.split()
+                net_recv += int(fields[0])
+                net_sent += int(fields[8])
+        
+        return (cpu_percent, 100.0 * mem_used / mem_total, mem_used,
+                disk_read, disk_write, net_sent, net_recv)
+    
+    def read_counters(self):
+        """
+        Read raw counters: (cpu %, memory %, memory used bytes,
+        disk read/write bytes, network sent/recv bytes)
+        """
+        if self._proc_fds:
+            return self.read_proc_counters()
+        
         memory = psutil.virtual_memory()
         disk_io = psutil.disk_io_counters()
         net_io = psutil.net_io_counters()
-        
-        # Get GPU utilization
-        gpu_util = []
-        for gpu in self.get_gpu_info():
-            gpu_util.append({
-                'gpu_id': gpu['id'],
-                'utilization': gpu['utilization_percent'],
-                'memory_used': gpu['memory_used_mb'],
-                'temperature': gpu['temperature']
-            })
-        
+        return (
+            psutil.cpu_percent(interval=None),
+            memory.percent,
+            memory.used,
+            disk_io.read_bytes if disk_io else 0,
+            disk_io.write_bytes if disk_io else 0,
+            net_io.bytes_sent if net_io else 0,
+            net_io.bytes_recv if net_io else 0
+        )
+    
+    def prime_counters(self):
+        """
+        Take baseline readings for the delta-based counters
+        
+        psutil.cpu_percent(interval=None) reports usage since the previous
+        call made in this process, and its very first call returns a
+        meaningless 0.0. Priming it (and the disk/network counters) once
+        up front makes every later sample a delta over a real interval
+        without sleeping inside psutil.
+        """
+        counters = self.read_counters()
+        self._prev_io = counters[3:]
+        self._prev_io_time = time.monotonic()
+    
+    def set_target_process(self, pid: int):
+        """Track a specific process, priming its cpu_percent() baseline"""
+        try:
+            self.process = psutil.Process(pid)
+            self.process.cpu_percent(interval=None)
+        except psutil.NoSuchProcess:
+            self.process = None
+    
+    def sample_resources(self):
+        """Read one sample: scalars in SAMPLE_COLUMNS order plus one row per GPU"""
+        counters = self.read_counters()
+        now = time.monotonic()
+        
+        # Throughput since the previous sample; the first sample reports 0
+        io = counters[3:]
+        rates = (0.0, 0.0, 0.0, 0.0)
+        if self._prev_io_time is not None and now > self._prev_io_time:
+            scale = 1.0 / ((now - self._prev_io_time) * 1024**2)
+            rates = tuple((current - prev) * scale for current, prev in zip(io, self._prev_io))
+        self._prev_io = io
+        self._prev_io_time = now
+        
+        values = (counters[0], counters[1], counters[2] / (1024**3)) + rates
+        gpu_values = [
+            (gpu['utilization_percent'], gpu['memory_used_mb'], gpu['temperature'])
+            for gpu in self.get_latest_gpu_info()
+        ]
+        return values, gpu_values
+    
+    def make_resource_metrics(self, values, gpu_values, timestamp: str = '') -> ResourceMetrics:
+        """Build a ResourceMetrics record from one sample"""
+        cpu, mem_percent, mem_used, disk_read, disk_write, net_sent, net_recv = values
         return ResourceMetrics(
-            cpu_percent=psutil.cpu_percent(),
-            memory_percent=memory.percent,
-            memory_used_gb=memory.used / (1024**3),
-            gpu_utilization=gpu_util,
-            disk_io={
-                'read_mb': disk_io.read_bytes / (1024**2) if disk_io else 0,
-                'write_mb': disk_io.write_bytes / (1024**2) if disk_io else 0
-            },
-            network_io={
-                'sent_mb': net_io.bytes_sent / (1024**2) if net_io else 0,
-                'recv_mb': net_io.bytes_recv / (1024**2) if net_io else 0
-            }
+            cpu_percent=cpu,
+            memory_percent=mem_percent,
+            memory_used_gb=mem_used,
+            gpu_utilization=[
+                {'gpu_id': i, 'utilization': util, 'memory_used': mem, 'temperature': temp}
+                for i, (util, mem, temp) in enumerate(gpu_values)
+            ],
+            disk_io={'read_mb_per_s': disk_read, 'write_mb_per_s': disk_write},
+            network_io={'sent_mb_per_s': net_sent, 'recv_mb_per_s': net_recv},
+            timestamp=timestamp
         )
     
+    def get_current_resources(self) -> ResourceMetrics:
+        """Get current resource utilization"""
+        timestamp = format_timestamp_ns(time.time_ns())
+        return self.make_resource_metrics(*self.sample_resources(), timestamp=timestamp)
+    
+    def reset_history(self, num_gpus: int = 0, capacity: int = HISTORY_CAPACITY):
+        """Allocate the fixed-size ring buffers holding the most recent samples"""
+        assert capacity & (capacity - 1) == 0, "capacity must be a power of two"
+        self._n = 0
+        self._mask = capacity - 1
+        self._samples = np.empty((len(SAMPLE_COLUMNS), capacity), dtype=np.float64)
+        # Wall-clock time_ns per sample; only formatted when the timeline is built
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._gpu_samples = np.zeros((len(GPU_SAMPLE_COLUMNS), capacity, num_gpus), dtype=np.float32)
+        
+        # Running aggregates, so stopping never rescans the history
+        # CPU and GPU are averaged weighted by each sample's interval, which
+        # varies once the monitor adapts its sampling rate
+        self._cpu_sum = 0.0
+        self._cpu_weight = 0.0
+        self._last_timestamp_ns = None
+        self._cpu_peak = 0.0
+        self._memory_peak = 0.0
+        self._gpu_util_sum = 0.0
+        self._gpu_util_peak = 0.0
+        self._gpu_util_weight = 0.0
+    
+    def append_sample(self, timestamp_ns: int, values, gpu_values):
+        """Append one sample to the history, overwriting the oldest once full"""
+        # Single writer (the drain thread); readers only look after it is joined
+        slot = self._n & self._mask
+        self._timestamps[slot] = timestamp_ns
+        self._samples[:, slot] = values
+        self._n += 1
+        
+        if self._last_timestamp_ns is None:
+            weight = self.monitor_interval
+        else:
+            weight = (timestamp_ns - self._last_timestamp_ns) / 1e9
+        self._last_timestamp_ns = timestamp_ns
+        
+        gpu = np.asarray(gpu_values, dtype=np.float32).reshape(-1, len(GPU_SAMPLE_COLUMNS))
+        num_gpus = min(len(gpu), self._gpu_samples.shape[2])
+        if num_gpus:
+            gpu = gpu[:num_gpus]
+            self._gpu_samples[:, slot, :num_gpus] = gpu.T
+            
+            # One vectorized reduce across all GPUs per tick
+            util = gpu[:, GPU_COL_UTILIZATION]
+            self._gpu_util_sum += float(util.sum()) * weight
+            util_peak = float(util.max())
+            if util_peak > self._gpu_util_peak:
+                self._gpu_util_peak = util_peak
+            self._gpu_util_weight += num_gpus * weight
+        
+        cpu = float(values[COL_CPU])
+        self._cpu_sum += cpu * weight
+        self._cpu_weight += weight
+        if cpu > self._cpu_peak:
+            self._cpu_peak = cpu
+        memory_used = float(values[COL_MEMORY_USED])
+        if memory_used > self._memory_peak:
+            self._memory_peak = memory_used
+    
+    def build_resource_timeline(self) -> List[ResourceMetrics]:
+        """Materialize the retained sample history, oldest first, as ResourceMetrics"""
+        count = min(self._n, self._mask + 1)
+        slots = np.arange(self._n - count, self._n) & self._mask
+        timestamps = self._timestamps[slots].tolist()
+        samples = self._samples[:, slots].T.tolist()
+        gpu_samples = self._gpu_samples[:, slots].transpose(1, 2, 0).tolist()
+        return [self.make_resource_metrics(values, gpu_values, format_timestamp_ns(timestamp_ns))
+                for timestamp_ns, values, gpu_values in zip(timestamps, samples, gpu_samples)]
+    
     def monitor_resources(self):
-        """Background thread to monitor resource usage"""
-        while self.monitoring:
+        """Background thread draining samples streamed by the monitor process"""
+        while True:
             try:
-                metrics = self.get_current_resources()
-                self.resource_history.append(metrics)
-                time.sleep(self.monitor_interval)
-            except Exception as e:
-                print(f"Warning: Resource monitoring error: {e}")
-                time.sleep(self.monitor_interval)
+                record = self._sample_queue.get(timeout=1.0)
+            except queue.Empty:
+                if self.monitor_proc.is_alive():
+                    continue
+                break
+            
+            if isinstance(record, bytes):
+                self.append_sample(*unpack_sample(record))
+            else:
+                # Final message: last full GPU reading plus scheduler stats
+                self._gpu_cache = record.pop('gpu_info')
+                self._gpu_cache_ts = time.monotonic()
+                self.monitor_stats = record
+                break
     
     def start_monitoring(self, target_process_id: Optional[int] = None):
-        """Start resource monitoring"""
+        """
+        Start resource monitoring
+        
+        CPU percentages are deltas between consecutive non-blocking
+        cpu_percent(interval=None) calls: the monitor process primes the
+        system-wide counter before its first tick, and the target process
+        counter is primed here (or in set_target_process), so the first
+        sample is not a spurious 0%.
+        """
         self.start_time = time.perf_counter()
         self.monitoring = True
-        self.resource_history = []
+        self.monitor_stats = {}
         
         if target_process_id:
-            try:
-                self.process = psutil.Process(target_process_id)
-            except psutil.NoSuchProcess:
-                self.process = None
+            self.set_target_process(target_process_id)
+        
+        self.reset_history(num_gpus=len(self.get_gpu_info()))
+        
+        # Sampling runs in its own process so it never competes with this
+        # interpreter for the GIL; this thread only drains packed records
+        self._sample_queue = mp.Queue()
+        self._stop_event = mp.Event()
+        self.monitor_proc = mp.Process(
+            target=monitor_worker,
+            args=(self.monitor_interval, self._sample_queue, self._stop_event, self.adaptive_interval),
+            daemon=True
+        )
+        self.monitor_proc.start()
         
         self.monitor_thread = threading.Thread(target=self.monitor_resources)
         self.monitor_thread.daemon = True
@@ -187,32 +618,40 @@ class AutoBenchmark:
         self.end_time = time.perf_counter()
         self.monitoring = False
         
+        if self._stop_event:
+            self._stop_event.set()
         if self.monitor_thread:
-            self.monitor_thread.join(timeout=2.0)
+            self.monitor_thread.join(timeout=5.0)
+        if self.monitor_proc:
+            self.monitor_proc.join(timeout=2.0)
+            if self.monitor_proc.is_alive():
+                self.monitor_proc.terminate()
+        
+        # One GPU reading (the monitor process's last) serves both
+        # system_info and gpu_metrics
+        gpu_metrics = self.get_gpu_info() if self._gpu_cache is None else self._gpu_cache
         
         execution_time = self.end_time - self.start_time
         
         # Calculate aggregated metrics
-        if self.resource_history:
-            cpu_usage = [r.cpu_percent for r in self.resource_history]
-            memory_usage = [r.memory_used_gb for r in self.resource_history]
-            
-            avg_cpu = np.mean(cpu_usage) if cpu_usage else 0
-            peak_cpu = np.max(cpu_usage) if cpu_usage else 0
-            peak_memory = np.max(memory_usage) if memory_usage else 0
-        else:
-            avg_cpu = peak_cpu = peak_memory = 0
+        # The ring keeps only the latest samples; the aggregates cover them all
+        self.monitor_stats['total_samples'] = self._n
+        avg_cpu = self._cpu_sum / self._cpu_weight if self._cpu_weight > 0 else 0.0
+        peak_cpu = self._cpu_peak
+        peak_memory = self._memory_peak
         
         # Get process-specific stats if available
         process_stats = {}
         if self.process:
             try:
-                process_stats = {
-                    'cpu_percent': self.process.cpu_percent(),
-                    'memory_mb': self.process.memory_info().rss / (1024**2),
-                    'num_threads': self.process.num_threads(),
-                    'status': self.process.status()
-                }
+                # oneshot() reads /proc/<pid>/* once for all four attributes
+                with self.process.oneshot():
+                    process_stats = {
+                        'cpu_percent': self.process.cpu_percent(),
+                        'memory_mb': self.process.memory_info().rss / (1024**2),
+                        'num_threads': self.process.num_threads(),
+                        'status': self.process.status()
+                    }
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 process_stats = {'error': 'Process no longer accessible'}
         
@@ -220,15 +659,16 @@ class AutoBenchmark:
         warp_metrics = self.detect_warp_metrics()
         
         results = BenchmarkResults(
-            system_info=self.get_system_info(),
+            system_info=self.get_system_info(gpu_info=gpu_metrics),
             execution_time=execution_time,
             peak_memory_usage=peak_memory,
             average_cpu_usage=avg_cpu,
             peak_cpu_usage=peak_cpu,
-            gpu_metrics=self.get_gpu_info(),
-            resource_timeline=self.resource_history,
+            gpu_metrics=gpu_metrics,
+            resource_timeline=self.build_resource_timeline(),
             process_stats=process_stats,
-            warp_specific_metrics=warp_metrics
+            warp_specific_metrics=warp_metrics,
+            monitor_stats=self.monitor_stats
         )
         
         print(f"[AutoBenchmark] Monitoring completed ({execution_time:.2f}s)")
@@ -244,52 +684,27 @@ class AutoBenchmark:
         
         # Try to detect WARP usage patterns
         try:
-            if self.resource_history:
-                gpu_usage = []
-                for metrics in self.resource_history:
-                    for gpu in metrics.gpu_utilization:
-                        gpu_usage.append(gpu['utilization'])
+            if self._gpu_util_weight > 0:
+                mean_gpu_usage = self._gpu_util_sum / self._gpu_util_weight
+                warp_metrics['estimated_gpu_usage'] = mean_gpu_usage
+                warp_metrics['peak_gpu_usage'] = self._gpu_util_peak
                 
-                if gpu_usage:
-                    warp_metrics['estimated_gpu_usage'] = np.mean(gpu_usage)
-                    warp_metrics['peak_gpu_usage'] = np.max(gpu_usage)
-                    
-                    # Detect simulation patterns
-                    if np.mean(gpu_usage) > 50:
-                        warp_metrics['simulation_type'] = 'gpu_intensive'
-                    elif np.mean(gpu_usage) > 10:
-                        warp_metrics['simulation_type'] = 'moderate_gpu'
-                    else:
-                        warp_metrics['simulation_type'] = 'cpu_primary'
+                # Detect simulation patterns
+                if mean_gpu_usage > 50:
+                    warp_metrics['simulation_type'] = 'gpu_intensive'
+                elif mean_gpu_usage > 10:
+                    warp_metrics['simulation_type'] = 'moderate_gpu'
+                else:
+                    warp_metrics['simulation_type'] = 'cpu_primary'
         
         except Exception as e:
             warp_metrics['detection_error'] = str(e)
         
         return warp_metrics
     
-    def make_json_safe(self, obj):
-        """Convert numpy arrays and other non-serializable objects to JSON-safe formats"""
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {key: self.make_json_safe(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self.make_json_safe(item) for item in obj]
-        elif hasattr(obj, '__dict__'):
-            return self.make_json_safe(asdict(obj) if hasattr(obj, '__dataclass_fields__') else obj.__dict__)
-        else:
-            return obj
-    
     def generate_report(self, results: BenchmarkResults) -> Dict[str, Any]:
         """Generate a comprehensive benchmark report"""
         
-        # Convert to JSON-safe format
-        safe_results = self.make_json_safe(results)
-        
         # Create summary metrics
         summary = {
             'execution_summary': {
@@ -298,7 +713,9 @@ class AutoBenchmark:
                 'average_cpu_percent': results.average_cpu_usage,
                 'peak_cpu_percent': results.peak_cpu_usage,
                 'gpu_count': len(results.gpu_metrics),
-                'monitoring_samples': len(results.resource_timeline)
+                'monitoring_samples': results.monitor_stats.get('total_samples', len(results.resource_timeline)),
+                'missed_sample_deadlines': results.monitor_stats.get('missed_deadlines', 0),
+                'sample_interval_changes': len(results.monitor_stats.get('interval_changes', []))
             },
             'system_summary': {
                 'cpu': f"{results.system_info.cpu_model} ({results.system_info.cpu_cores}C/{results.system_info.cpu_threads}T)",
@@ -314,98 +731,232 @@ class AutoBenchmark:
             'benchmark_type': 'auto_post_execution',
             'timestamp': results.system_info.timestamp,
             'summary': summary,
-            'detailed_results': safe_results,
+            'detailed_results': results,
             'format_version': '1.0'
         }
     
     def calculate_performance_rating(self, results: BenchmarkResults) -> Dict[str, str]:
         """Calculate performance ratings"""
-        ratings = {}
-        
-        # CPU performance rating
-        if results.average_cpu_usage > 80:
-            ratings['cpu'] = 'High Utilization'
-        elif results.average_cpu_usage > 50:
-            ratings['cpu'] = 'Moderate Utilization'
-        else:
-            ratings['cpu'] = 'Low Utilization'
-        
-        # Memory performance rating
-        memory_percent = (results.peak_memory_usage / results.system_info.total_memory_gb) * 100
-        if memory_percent > 80:
-            ratings['memory'] = 'High Usage'
-        elif memory_percent > 50:
-            ratings['memory'] = 'Moderate Usage'
-        else:
-            ratings['memory'] = 'Low Usage'
-        
-        # GPU performance rating
-        if results.warp_specific_metrics.get('estimated_gpu_usage', 0) > 70:
-            ratings['gpu'] = 'High Utilization'
-        elif results.warp_specific_metrics.get('estimated_gpu_usage', 0) > 30:
-            ratings['gpu'] = 'Moderate Utilization'
-        else:
-            ratings['gpu'] = 'Low Utilization'
-        
-        return ratings
+        cpu_bin, memory_bin, gpu_bin = classify_metrics(rating_metrics(results))[:, 0]
+        return {
+            'cpu': CPU_RATING_LABELS[cpu_bin],
+            'memory': MEMORY_RATING_LABELS[memory_bin],
+            'gpu': GPU_RATING_LABELS[gpu_bin],
+        }
     
     def generate_recommendations(self, results: BenchmarkResults) -> List[str]:
         """Generate performance recommendations"""
-        recommendations = []
-        
-        if results.average_cpu_usage > 90:
-            recommendations.append("Consider using more CPU cores or optimizing algorithms")
-        
-        if results.peak_memory_usage > results.system_info.total_memory_gb * 0.9:
-            recommendations.append("Memory usage is very high - consider optimizing data structures")
-        
-        if results.warp_specific_metrics.get('estimated_gpu_usage', 0) < 20:
-            recommendations.append("GPU utilization is low - verify WARP is using GPU acceleration")
-        
-        if results.execution_time > 60:
-            recommendations.append("Long execution time - consider reducing problem size or optimizing")
+        recommendations = [RECOMMENDATIONS[i] for i in np.flatnonzero(recommendation_flags(results))]
         
         if not recommendations:
             recommendations.append("Performance looks good - no specific recommendations")
         
         return recommendations
 
-def benchmark_execution(script_path: str, monitor_interval: float = 0.1) -> Dict[str, Any]:
+def rating_metrics(*results: BenchmarkResults) -> np.ndarray:
+    """Stack (cpu %, peak memory %, gpu %) for one or more runs into a (3, n) array"""
+    return np.array([
+        [r.average_cpu_usage for r in results],
+        [r.peak_memory_usage / r.system_info.total_memory_gb * 100 for r in results],
+        [r.warp_specific_metrics.get('estimated_gpu_usage', 0) for r in results],
+    ], dtype=np.float64).reshape(3, -1)
+
+def classify_metrics(metrics: np.ndarray) -> np.ndarray:
+    """Map a (3, n) rating_metrics array to label indices; right=True keeps the strict '>' edges"""
+    return np.stack([
+        np.digitize(metrics[0], CPU_RATING_BINS, right=True),
+        np.digitize(metrics[1], MEMORY_RATING_BINS, right=True),
+        np.digitize(metrics[2], GPU_RATING_BINS, right=True),
+    ])
+
+def recommendation_flags(results: BenchmarkResults) -> np.ndarray:
+    """Boolean mask over RECOMMENDATIONS for a single run"""
+    values = np.array([
+        results.average_cpu_usage,
+        results.peak_memory_usage / results.system_info.total_memory_gb,
+        results.warp_specific_metrics.get('estimated_gpu_usage', 0),
+        results.execution_time,
+    ])
+    return np.where(RECOMMENDATION_ABOVE, values > RECOMMENDATION_THRESHOLDS, values < RECOMMENDATION_THRESHOLDS)
+
+def rate_results(results_list: List[BenchmarkResults]) -> List[Dict[str, str]]:
+    """Rate a batch of runs with one digitize pass per metric"""
+    if not results_list:
+        return []
+    bins = classify_metrics(rating_metrics(*results_list))
+    return [
+        {'cpu': CPU_RATING_LABELS[c], 'memory': MEMORY_RATING_LABELS[m], 'gpu': GPU_RATING_LABELS[g]}
+        for c, m, g in bins.T
+    ]
+
+def monitor_worker(monitor_interval: float, sample_queue, stop_event, adaptive: bool = True):
+    """Monitor process: sample resources and stream packed records to the parent"""
+    sampler = AutoBenchmark(monitor_interval)
+    sampler.start_gpu_stream()
+    sampler.open_proc_files()
+    sampler.prime_counters()
+    missed_deadlines = 0
+    
+    # Adaptive interval state: smoothed utilization change between samples
+    base_interval = monitor_interval
+    max_interval = max(base_interval, ADAPTIVE_MAX_INTERVAL)
+    interval_changes = []
+    last_levels = None
+    ewma_delta = 0.0
+    steady_ticks = 0
+    try:
+        # Sleep until absolute deadlines so the sampling cost does not add
+        # to the period; a late tick resets the schedule instead of bursting.
+        # Each sample closes an interval, with a final one taken on stop.
+        next_t = time.monotonic()
+        stopping = False
+        while not stopping:
+            next_t += monitor_interval
+            sleep_for = next_t - time.monotonic()
+            if sleep_for > 0:
+                stopping = stop_event.wait(sleep_for)
+            else:
+                missed_deadlines += 1
+                next_t = time.monotonic()
+                stopping = stop_event.is_set()
+            
+            try:
+                timestamp_ns = time.time_ns()
+                values, gpu_values = sampler.sample_resources()
+                sample_queue.put(pack_sample(timestamp_ns, values, gpu_values))
+            except Exception as e:
+                print(f"Warning: Resource monitoring error: {e}")
+                continue
+            
+            if not adaptive:
+                continue
+            levels = [values[COL_CPU]] + [gpu[GPU_COL_UTILIZATION] for gpu in gpu_values]
+            if last_levels is not None and len(levels) == len(last_levels):
+                delta = max(abs(a - b) for a, b in zip(levels, last_levels))
+                ewma_delta += ADAPTIVE_EWMA_ALPHA * (delta - ewma_delta)
+                new_interval = monitor_interval
+                if delta > ADAPTIVE_SPIKE_DELTA:
+                    new_interval = base_interval
+                    steady_ticks = 0
+                elif ewma_delta < ADAPTIVE_STEADY_DELTA:
+                    steady_ticks += 1
+                    if steady_ticks >= ADAPTIVE_STEADY_TICKS:
+                        new_interval = min(monitor_interval * 2, max_interval)
+                        steady_ticks = 0
+                else:
+                    steady_ticks = 0
+                if new_interval != monitor_interval:
+                    monitor_interval = new_interval
+                    interval_changes.append({
+                        'timestamp': format_timestamp_ns(timestamp_ns),
+                        'interval': monitor_interval
+                    })
+            last_levels = levels
+    finally:
+        sample_queue.put({
+            'gpu_info': sampler.get_latest_gpu_info(),
+            'missed_deadlines': missed_deadlines,
+            'interval_changes': interval_changes
+        })
+        sampler.stop_gpu_stream()
+        sampler.close_proc_files()
+
+def write_stdout_bytes(payload: bytes):
+    """Write an encoded payload straight to fd 1, after anything print() buffered"""
+    sys.stdout.flush()
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(sys.stdout.fileno(), view):]
+
+def pump_stream(source, sink, output_stats: Dict[str, Any], key: str):
+    """Copy a child's output pipe line by line as it arrives, counting bytes"""
+    for line in source:
+        sink.write(line)
+        sink.flush()
+        output_stats[key] += len(line)
+    source.close()
+
+def launch_script(script_path: str):
+    """
+    Start `python script_path` with its stdout/stderr piped back to us
+    
+    Uses os.posix_spawn where available so the kernel creates the child
+    without duplicating this process's address space; other platforms
+    fall back to subprocess.Popen.
+    
+    Returns:
+        (pid, stdout pipe, stderr pipe, wait function returning the exit code)
+    """
+    if not hasattr(os, 'posix_spawn'):
+        process = subprocess.Popen([
+            sys.executable, script_path
+        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return process.pid, process.stdout, process.stderr, process.wait
+    
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    try:
+        pid = os.posix_spawn(sys.executable, [sys.executable, script_path], os.environ,
+                             file_actions=[(os.POSIX_SPAWN_DUP2, out_w, 1),
+                                           (os.POSIX_SPAWN_DUP2, err_w, 2)])
+    except OSError:
+        os.close(out_r)
+        os.close(err_r)
+        raise
+    finally:
+        # The child has its own copies on fds 1/2; the originals are close-on-exec
+        os.close(out_w)
+        os.close(err_w)
+    
+    def wait() -> int:
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+    
+    return pid, os.fdopen(out_r, 'rb'), os.fdopen(err_r, 'rb'), wait
+
+def benchmark_execution(script_path: str, monitor_interval: float = 0.1,
+                        adaptive_interval: bool = True) -> Dict[str, Any]:
     """
     Run a Python script and automatically benchmark its execution
     
     Args:
         script_path: Path to the Python script to execute
         monitor_interval: How often to sample resource usage (seconds)
+        adaptive_interval: Back off sampling while utilization is steady
     
     Returns:
         Dictionary containing benchmark results
     """
-    benchmark = AutoBenchmark(monitor_interval)
+    benchmark = AutoBenchmark(monitor_interval, adaptive_interval)
+    output_stats = {'stdout_bytes': 0, 'stderr_bytes': 0, 'return_code': None}
     
     # Start monitoring
     benchmark.start_monitoring()
     
     try:
         # Execute the script
-        print(f"[AutoBenchmark] Executing: {script_path}")
+        print(f"[AutoBenchmark] Executing: {script_path}", flush=True)
         
-        # Run the script as a subprocess to monitor it
-        process = subprocess.Popen([
-            sys.executable, script_path
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        # Run the script as a child process to monitor it
+        pid, child_stdout, child_stderr, wait = launch_script(script_path)
         
         # Start monitoring the specific process
-        benchmark.process = psutil.Process(process.pid)
+        benchmark.set_target_process(pid)
+        
+        # Forward output live instead of buffering it all until exit
+        pumps = [
+            threading.Thread(target=pump_stream, daemon=True,
+                             args=(child_stdout, sys.stdout.buffer, output_stats, 'stdout_bytes')),
+            threading.Thread(target=pump_stream, daemon=True,
+                             args=(child_stderr, sys.stderr.buffer, output_stats, 'stderr_bytes'))
+        ]
+        for pump in pumps:
+            pump.start()
         
         # Wait for completion
-        stdout, stderr = process.communicate()
-        
-        # Print output
-        if stdout:
-            print(stdout)
-        if stderr:
-            print(f"STDERR: {stderr}", file=sys.stderr)
+        output_stats['return_code'] = wait()
+        for pump in pumps:
+            pump.join()
         
     except Exception as e:
         print(f"[AutoBenchmark] Execution error: {e}")
@@ -414,6 +965,7 @@ def benchmark_execution(script_path: str, monitor_interval: float = 0.1) -> Dict
         # Stop monitoring and get results
         results = benchmark.stop_monitoring()
         report = benchmark.generate_report(results)
+        report['output_stats'] = output_stats
         
         # Print benchmark summary
         print("\n" + "="*60)
@@ -434,8 +986,8 @@ def benchmark_execution(script_path: str, monitor_interval: float = 0.1) -> Dict
         
         print("="*60)
         
-        # Output JSON for frontend consumption
-        print(f"\nBENCHMARK_OUTPUT:{json.dumps(report)}")
+        # Output JSON for frontend consumption (orjson walks the dataclasses in C)
+        write_stdout_bytes(b'\nBENCHMARK_OUTPUT:' + orjson.dumps(report, option=JSON_OPTIONS) + b'\n')
         
         return report
 
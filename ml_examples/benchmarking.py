@@ -16,7 +16,7 @@ The benchmarking runs in parallel with the target script and outputs
 comprehensive hardware metrics for frontend display.
 """
 
-import json
+import orjson
 import time
 import psutil
 import subprocess
@@ -25,10 +25,57 @@ import sys
 import os
 import threading
 import signal
+import atexit
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 import numpy as np
 
+# Timeline fields, stored as one flat record per tick rather than per-sample objects
+SAMPLE_FIELDS = ('timestamp', 'cpu_percent', 'memory_percent', 'memory_used_gb',
+                 'memory_total_gb', 'process_cpu_percent', 'process_memory_mb')
+GPU_FIELDS = ('utilization_percent', 'memory_used_mb', 'memory_total_mb', 'memory_percent',
+              'temperature_c', 'power_draw_w', 'clock_graphics_mhz', 'clock_memory_mhz')
+GPU_INT_FIELDS = {'memory_used_mb', 'memory_total_mb', 'temperature_c',
+                  'clock_graphics_mhz', 'clock_memory_mhz'}
+
+def timeline_dtype(num_gpus: int) -> np.dtype:
+    """Record for one tick: the sample scalars, then one (num_gpus,) array per gpu_-prefixed GPU field"""
+    return np.dtype(
+        [(name, np.float64) for name in SAMPLE_FIELDS] +
+        [('gpu_' + name, np.int64 if name in GPU_INT_FIELDS else np.float64, (num_gpus,))
+         for name in GPU_FIELDS]
+    )
+
+# procfs units: CPU times are in clock ticks, statm sizes in pages
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Samples kept for timeline_data (10 min at 0.1 s); aggregates cover the whole run
+TIMELINE_CAPACITY = 6000
+
+# orjson serializes dataclasses natively; this adds numpy arrays and scalars
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def json_default(obj):
+    """orjson fallback for values it does not serialize natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+# nvidia-smi fallback query; columns after index and name map onto GPU_FIELDS
+SMI_QUERY_FIELDS = ('index', 'name', 'utilization.gpu', 'memory.used', 'memory.total',
+                    'temperature.gpu', 'power.draw', 'clocks.current.graphics',
+                    'clocks.current.memory')
+
+def smi_number(text: str) -> float:
+    """One nvidia-smi CSV field as a number; '[N/A]' and similar read as 0"""
+    try:
+        return float(text)
+    except ValueError:
+        return 0
+
 @dataclass
 class GPUMetrics:
     """GPU utilization metrics"""
@@ -76,15 +123,108 @@ class BenchmarkReport:
 class HardwareBenchmark:
     """Real-time hardware monitoring for WARP simulations"""
     
-    def __init__(self, monitor_interval: float = 0.1):
+    def __init__(self, monitor_interval: float = 0.1, gpu_interval: float = 0.1):
         self.monitor_interval = monitor_interval
-        self.monitoring = False
+        self.gpu_interval = gpu_interval
+        self._stop = threading.Event()
         self.start_time = None
-        self.timeline = []
+        self.reset_timeline()
         self.target_process = None
         self.monitor_thread = None
         
+        # System fields that do not change during a run, filled on first use
+        self._static_system_info = None
+        
+        # /proc/stat kept open while monitoring (Linux) and re-read with pread()
+        self._stat_fd = None
+        self._prev_cpu_times = None
+        
+        # Same for the target's /proc/<pid>/stat and statm
+        self._proc_stat_fd = None
+        self._proc_statm_fd = None
+        self._prev_proc_times = None
+        
+        # Last GPU reading; GPU counters refresh slower than CPU/memory, so
+        # queries closer together than gpu_interval reuse it
+        self._last_gpu_ts = None
+        self._last_gpu_rows = []
+        
+        # In-process NVML handles and (immutable) device names;
+        # None means fall back to nvidia-smi. A working NVML also answers
+        # check_cuda_available; otherwise nvidia-smi is probed once on demand
+        self._cuda_available = None
+        self._nvml = None
+        self._nvml_handles = None
+        self._nvml_names = None
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            atexit.register(pynvml.nvmlShutdown)
+            self._nvml = pynvml
+            self._nvml_handles = [pynvml.nvmlDeviceGetHandleByIndex(i)
+                                  for i in range(pynvml.nvmlDeviceGetCount())]
+            self._nvml_names = []
+            for handle in self._nvml_handles:
+                name = pynvml.nvmlDeviceGetName(handle)
+                self._nvml_names.append(name.decode() if isinstance(name, bytes) else name)
+            self._cuda_available = True
+        except Exception:
+            self._nvml = None
+            self._nvml_handles = None
+            self._nvml_names = None
+    
+    def read_nvml_gpu_rows(self) -> List[tuple]:
+        """Read per-GPU values in GPU_FIELDS order through NVML without spawning nvidia-smi"""
+        nvml = self._nvml
+        
+        def optional(query, *args):
+            # Power and clocks are not supported on every board
+            try:
+                return query(*args)
+            except nvml.NVMLError:
+                return 0
+        
+        rows = []
+        for handle in self._nvml_handles:
+            memory = nvml.nvmlDeviceGetMemoryInfo(handle)
+            memory_used = memory.used >> 20
+            memory_total = memory.total >> 20
+            rows.append((
+                float(nvml.nvmlDeviceGetUtilizationRates(handle).gpu),
+                memory_used,
+                memory_total,
+                (memory_used / memory_total * 100) if memory_total > 0 else 0,
+                optional(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU),
+                optional(nvml.nvmlDeviceGetPowerUsage, handle) / 1000.0,
+                optional(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS),
+                optional(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_MEM)
+            ))
+        return rows
+    
+    def get_nvml_gpu_metrics(self) -> List[GPUMetrics]:
+        """Get detailed NVIDIA GPU metrics through NVML without spawning nvidia-smi"""
+        return [GPUMetrics(i, name, *row)
+                for i, (name, row) in enumerate(zip(self._nvml_names, self.read_nvml_gpu_rows()))]
+    
     def get_nvidia_gpu_metrics(self) -> List[GPUMetrics]:
+        """Get detailed NVIDIA GPU metrics using NVML, or nvidia-smi when NVML is unavailable"""
+        if self._nvml_handles is not None:
+            try:
+                return self.get_nvml_gpu_metrics()
+            except Exception as e:
+                print(f"Warning: NVML query failed, falling back to nvidia-smi: {e}")
+        return self.get_smi_gpu_metrics()
+    
+    def read_gpu_rows(self) -> List[tuple]:
+        """Per-GPU values in GPU_FIELDS order, skipping GPUMetrics objects on the NVML path"""
+        if self._nvml_handles is not None:
+            try:
+                return self.read_nvml_gpu_rows()
+            except Exception as e:
+                print(f"Warning: NVML query failed, falling back to nvidia-smi: {e}")
+        return [tuple(getattr(gpu, name) for name in GPU_FIELDS) for gpu in self.get_smi_gpu_metrics()]
+    
+    def get_smi_gpu_metrics(self) -> List[GPUMetrics]:
         """Get detailed NVIDIA GPU metrics using nvidia-smi"""
         gpu_metrics = []
         
@@ -92,46 +232,18 @@ class HardwareBenchmark:
             # Query comprehensive GPU data
             cmd = [
                 'nvidia-smi',
-                '--query-gpu=index,name,utilization.gpu,memory.used,memory.total,temperature.gpu,power.draw,clocks.current.graphics,clocks.current.memory',
+                f"--query-gpu={','.join(SMI_QUERY_FIELDS)}",
                 '--format=csv,noheader,nounits'
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
             
             if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
-                        parts = [p.strip() for p in line.split(',')]
-                        if len(parts) >= 9:
-                            try:
-                                gpu_id = int(parts[0]) if parts[0].isdigit() else 0
-                                name = parts[1]
-                                utilization = float(parts[2]) if parts[2].replace('.', '').isdigit() else 0
-                                memory_used = int(parts[3]) if parts[3].isdigit() else 0
-                                memory_total = int(parts[4]) if parts[4].isdigit() else 0
-                                temperature = int(parts[5]) if parts[5].replace('.', '').isdigit() else 0
-                                power_draw = float(parts[6]) if parts[6].replace('.', '').isdigit() else 0
-                                clock_graphics = int(parts[7]) if parts[7].isdigit() else 0
-                                clock_memory = int(parts[8]) if parts[8].isdigit() else 0
-                                
-                                memory_percent = (memory_used / memory_total * 100) if memory_total > 0 else 0
-                                
-                                gpu_metrics.append(GPUMetrics(
-                                    gpu_id=gpu_id,
-                                    name=name,
-                                    utilization_percent=utilization,
-                                    memory_used_mb=memory_used,
-                                    memory_total_mb=memory_total,
-                                    memory_percent=memory_percent,
-                                    temperature_c=temperature,
-                                    power_draw_w=power_draw,
-                                    clock_graphics_mhz=clock_graphics,
-                                    clock_memory_mhz=clock_memory
-                                ))
-                            except (ValueError, IndexError) as e:
-                                print(f"Warning: Could not parse GPU data: {e}")
-                                continue
-                                
+                for line in result.stdout.splitlines():
+                    gpu = self.parse_smi_line(line)
+                    if gpu is not None:
+                        gpu_metrics.append(gpu)
+            
         except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.CalledProcessError) as e:
             print(f"Warning: nvidia-smi not available or failed: {e}")
             # Fallback: create placeholder GPU metrics
@@ -150,26 +262,53 @@ class HardwareBenchmark:
             
         return gpu_metrics
     
-    def get_system_info(self) -> Dict[str, Any]:
-        """Get comprehensive system information"""
+    def parse_smi_line(self, line: str) -> Optional[GPUMetrics]:
+        """Parse one `nvidia-smi --query-gpu=SMI_QUERY_FIELDS` CSV row"""
+        parts = line.split(',')
+        if len(parts) < len(SMI_QUERY_FIELDS):
+            return None
+        
+        # float() tolerates the padding around each field; only rows with an
+        # unsupported ('[N/A]') column take the per-field path
         try:
+            gpu_id = int(parts[0])
+            values = list(map(float, parts[2:len(SMI_QUERY_FIELDS)]))
+        except ValueError:
+            gpu_id = int(smi_number(parts[0]))
+            values = [smi_number(p) for p in parts[2:len(SMI_QUERY_FIELDS)]]
+        utilization, memory_used, memory_total, temperature, power_draw, clock_graphics, clock_memory = values
+        
+        return GPUMetrics(
+            gpu_id=gpu_id,
+            name=parts[1].strip(),
+            utilization_percent=utilization,
+            memory_used_mb=int(memory_used),
+            memory_total_mb=int(memory_total),
+            memory_percent=(memory_used / memory_total * 100) if memory_total > 0 else 0,
+            temperature_c=int(temperature),
+            power_draw_w=power_draw,
+            clock_graphics_mhz=int(clock_graphics),
+            clock_memory_mhz=int(clock_memory)
+        )
+    
+    def get_static_system_info(self) -> Dict[str, Any]:
+        """Get the system information that stays fixed over a run, computed once"""
+        if self._static_system_info is None:
             memory = psutil.virtual_memory()
             cpu_freq = psutil.cpu_freq()
             
             # Get GPU info
             gpu_info = self.get_nvidia_gpu_metrics()
             
-            return {
+            self._static_system_info = {
                 "cpu": {
                     "model": platform.processor(),
                     "cores_physical": psutil.cpu_count(logical=False),
                     "cores_logical": psutil.cpu_count(logical=True),
-                    "frequency_mhz": cpu_freq.current if cpu_freq else 0,
                     "frequency_max_mhz": cpu_freq.max if cpu_freq else 0
                 },
                 "memory": {
-                    "total_gb": memory.total / (1024**3),
-                    "available_gb": memory.available / (1024**3)
+                    "total_gb": memory.total / (1024**3)
                 },
                 "gpu": [asdict(gpu) for gpu in gpu_info],
                 "platform": {
@@ -183,6 +322,25 @@ class HardwareBenchmark:
                     "cuda_available": self.check_cuda_available()
                 }
             }
+        return self._static_system_info
+    
+    def get_system_info(self) -> Dict[str, Any]:
+        """Get comprehensive system information"""
+        try:
+            static = self.get_static_system_info()
+            cpu_freq = psutil.cpu_freq()
+            
+            return {
+                **static,
+                "cpu": {
+                    **static["cpu"],
+                    "frequency_mhz": cpu_freq.current if cpu_freq else 0
+                },
+                "memory": {
+                    **static["memory"],
+                    "available_gb": psutil.virtual_memory().available / (1024**3)
+                }
+            }
         except Exception as e:
             print(f"Warning: Could not get system info: {e}")
             return {}
@@ -197,65 +355,220 @@ class HardwareBenchmark:
     
     def check_cuda_available(self) -> bool:
         """Check if CUDA is available"""
+        if self._cuda_available is None:
+            try:
+                result = subprocess.run(['nvidia-smi'], capture_output=True, timeout=3)
+                self._cuda_available = result.returncode == 0
+            except:
+                self._cuda_available = False
+        return self._cuda_available
+    
+    def open_stat(self):
+        """Open /proc/stat once for pread() reuse on every sample (Linux only)"""
+        if platform.system() != 'Linux' or self._stat_fd is not None:
+            return
         try:
-            result = subprocess.run(['nvidia-smi'], capture_output=True, timeout=3)
-            return result.returncode == 0
-        except:
-            return False
+            self._stat_fd = os.open('/proc/stat', os.O_RDONLY)
+        except OSError:
+            self._stat_fd = None
     
-    def collect_metrics(self) -> SystemMetrics:
-        """Collect current system metrics"""
+    def open_process_stat(self, pid: int):
+        """Open the target's /proc/<pid>/stat and statm once for pread() reuse (Linux only)"""
+        if platform.system() != 'Linux' or self._proc_stat_fd is not None:
+            return
+        try:
+            self._proc_stat_fd = os.open(f'/proc/{pid}/stat', os.O_RDONLY)
+            self._proc_statm_fd = os.open(f'/proc/{pid}/statm', os.O_RDONLY)
+        except OSError:
+            self.close_process_stat()
+    
+    def close_process_stat(self):
+        """Close the cached /proc/<pid> descriptors"""
+        for fd in (self._proc_stat_fd, self._proc_statm_fd):
+            if fd is not None:
+                os.close(fd)
+        self._proc_stat_fd = None
+        self._proc_statm_fd = None
+        self._prev_proc_times = None
+    
+    def close_stat(self):
+        """Close the cached /proc/stat descriptor"""
+        if self._stat_fd is not None:
+            os.close(self._stat_fd)
+            self._stat_fd = None
+        self._prev_cpu_times = None
+        self.close_process_stat()
+    
+    def read_cpu_percent(self) -> float:
+        """System-wide CPU utilization since the previous call"""
+        if self._stat_fd is None:
+            return psutil.cpu_percent(percpu=False)
+        
+        # Aggregate "cpu" line: busy share of the jiffies elapsed since last read
+        cpu_line = os.pread(self._stat_fd, 512, 0).split(b'\n', 1)[0]
+        times = [int(v) for v in cpu_line.split()[1:9]]
+        cpu_total = sum(times)
+        cpu_idle = times[3] + times[4]  # idle + iowait
+        prev_total, prev_idle = self._prev_cpu_times or (cpu_total, cpu_idle)
+        self._prev_cpu_times = (cpu_total, cpu_idle)
+        elapsed = cpu_total - prev_total
+        return 100.0 * (elapsed - (cpu_idle - prev_idle)) / elapsed if elapsed > 0 else 0.0
+    
+    def read_process_usage(self):
+        """Target CPU percent since the previous call and RSS in MB, from cached /proc fds"""
+        if self._proc_stat_fd is None:
+            return self.target_process.cpu_percent(), self.target_process.memory_info().rss / (1024**2)
+        
+        # utime + stime are stat fields 14-15; count from after "(comm)", which may hold spaces
+        now = time.monotonic()
+        stat = os.pread(self._proc_stat_fd, 4096, 0)
+        fields = stat[stat.rindex(b')') + 2:].split()
+        cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        prev_time, prev_now = self._prev_proc_times or (cpu_time, now)
+        self._prev_proc_times = (cpu_time, now)
+        wall = now - prev_now
+        process_cpu = 100.0 * (cpu_time - prev_time) / wall if wall > 0 else 0.0
+        
+        # statm field 2 is the resident set in pages
+        rss_pages = int(os.pread(self._proc_statm_fd, 4096, 0).split()[1])
+        return process_cpu, rss_pages * PAGE_SIZE / (1024**2)
+    
+    def read_sample(self):
+        """Read one sample as raw values: SAMPLE_FIELDS order plus per-GPU GPU_FIELDS rows"""
         # System-wide metrics
         memory = psutil.virtual_memory()
-        cpu_percent = psutil.cpu_percent()
+        cpu_percent = self.read_cpu_percent()
         
         # Process-specific metrics
         process_cpu = 0
         process_memory = 0
         if self.target_process:
             try:
-                process_cpu = self.target_process.cpu_percent()
-                process_memory = self.target_process.memory_info().rss / (1024**2)  # MB
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                process_cpu, process_memory = self.read_process_usage()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
                 pass
         
-        # GPU metrics
-        gpu_metrics = self.get_nvidia_gpu_metrics()
-        
-        return SystemMetrics(
-            timestamp=time.time(),
-            cpu_percent=cpu_percent,
-            memory_percent=memory.percent,
-            memory_used_gb=memory.used / (1024**3),
-            memory_total_gb=memory.total / (1024**3),
-            gpu_metrics=gpu_metrics,
-            process_cpu_percent=process_cpu,
-            process_memory_mb=process_memory
+        values = (
+            time.time(),
+            cpu_percent,
+            memory.percent,
+            memory.used / (1024**3),
+            memory.total / (1024**3),
+            process_cpu,
+            process_memory
         )
+        return values, self.read_cached_gpu_rows()
+    
+    def read_cached_gpu_rows(self) -> List[tuple]:
+        """GPU rows refreshed at most once per gpu_interval (never faster than monitor_interval)"""
+        now = time.monotonic()
+        interval = max(self.monitor_interval, self.gpu_interval)
+        if self._last_gpu_ts is None or now - self._last_gpu_ts >= interval:
+            self._last_gpu_rows = self.read_gpu_rows()
+            self._last_gpu_ts = now
+        return self._last_gpu_rows
+    
+    def collect_metrics(self) -> SystemMetrics:
+        """Collect current system metrics"""
+        values, gpu_rows = self.read_sample()
+        gpu_metrics = [
+            GPUMetrics(gpu_id, name, *row)
+            for gpu_id, (name, row) in enumerate(zip(self._gpu_names or self.get_gpu_names(), gpu_rows))
+        ]
+        return SystemMetrics(gpu_metrics=gpu_metrics, **dict(zip(SAMPLE_FIELDS, values)))
+    
+    def get_gpu_names(self) -> List[str]:
+        """Names of the GPUs reported in each sample"""
+        if self._nvml_names is not None:
+            return self._nvml_names
+        return [gpu['name'] for gpu in self.get_system_info().get('gpu', [])]
+    
+    def reset_timeline(self, gpu_names: Optional[List[str]] = None,
+                       capacity: int = TIMELINE_CAPACITY):
+        """Allocate the fixed-size timeline ring of per-tick records"""
+        self._gpu_names = list(gpu_names or [])
+        self._n = 0
+        self._timeline = np.zeros(capacity, dtype=timeline_dtype(len(self._gpu_names)))
+        self._gpu_block = np.zeros((len(GPU_FIELDS), len(self._gpu_names)))
+        
+        # Running per-field sums and peaks over every sample, wrapped or not
+        self._sample_sums = np.zeros(len(SAMPLE_FIELDS))
+        self._sample_peaks = np.full(len(SAMPLE_FIELDS), -np.inf)
+        self._gpu_sums = np.zeros(len(GPU_FIELDS))
+        self._gpu_peaks = np.full(len(GPU_FIELDS), -np.inf)
+        self._gpu_count = 0
+    
+    def _record_sample(self, values, gpu_rows):
+        """Write one raw sample into the timeline ring, overwriting the oldest once full"""
+        self._sample_sums += values
+        np.maximum(self._sample_peaks, values, out=self._sample_peaks)
+        
+        # GPU fields x GPUs, zero for GPUs missing from this reading
+        block = self._gpu_block
+        block[:] = 0
+        num_gpus = min(len(gpu_rows), len(self._gpu_names))
+        if num_gpus:
+            block[:, :num_gpus] = np.transpose(gpu_rows[:num_gpus])
+            self._gpu_sums += block[:, :num_gpus].sum(axis=1)
+            np.maximum(self._gpu_peaks, block[:, :num_gpus].max(axis=1), out=self._gpu_peaks)
+            self._gpu_count += num_gpus
+        
+        # One record assignment per tick, under the sample's single timestamp
+        self._timeline[self._n % len(self._timeline)] = (*values, *block)
+        self._n += 1
+    
+    def _materialize_timeline(self) -> List[SystemMetrics]:
+        """Rebuild SystemMetrics/GPUMetrics records, oldest first, from the retained samples"""
+        capacity = len(self._timeline)
+        slots = np.arange(max(self._n - capacity, 0), self._n) % capacity
+        records = self._timeline[slots]
+        
+        # Convert field by field, so subarray fields come back as Python lists too
+        samples = zip(*(records[name].tolist() for name in SAMPLE_FIELDS))
+        gpu_samples = zip(*(records['gpu_' + name].tolist() for name in GPU_FIELDS))
+        timeline = []
+        for values, gpu_columns in zip(samples, gpu_samples):
+            gpu_metrics = [
+                GPUMetrics(gpu_id, name, *row)
+                for gpu_id, (name, row) in enumerate(zip(self._gpu_names, zip(*gpu_columns)))
+            ]
+            timeline.append(SystemMetrics(gpu_metrics=gpu_metrics, **dict(zip(SAMPLE_FIELDS, values))))
+        return timeline
     
     def monitor_loop(self):
         """Background monitoring loop"""
-        while self.monitoring:
+        # Wait first, so every sample spans a full interval after the baseline
+        # read in start_monitoring; set() wakes the wait at once on shutdown
+        while not self._stop.wait(self.monitor_interval):
             try:
-                metrics = self.collect_metrics()
-                self.timeline.append(metrics)
-                time.sleep(self.monitor_interval)
+                self._record_sample(*self.read_sample())
             except Exception as e:
                 print(f"Warning: Monitoring error: {e}")
-                time.sleep(self.monitor_interval)
     
     def start_monitoring(self, target_pid: Optional[int] = None):
         """Start hardware monitoring"""
-        self.monitoring = True
-        self.start_time = time.time()
-        self.timeline = []
+        self._stop.clear()
+        self.start_time = time.monotonic()
+        
+        # Static system info also fixes the GPU set the timeline is sized for,
+        # and is warm before stop_monitoring only refreshes the dynamic fields
+        self.reset_timeline(self.get_gpu_names())
+        self._last_gpu_ts = None
+        
+        # Baseline reading, so the first sample covers its own interval
+        self.open_stat()
+        self.read_cpu_percent()
         
         if target_pid:
             try:
                 self.target_process = psutil.Process(target_pid)
+                self.open_process_stat(target_pid)
+                self.read_process_usage()
             except psutil.NoSuchProcess:
                 print(f"Warning: Process {target_pid} not found")
                 self.target_process = None
+            except OSError:
+                self.close_process_stat()
         
         self.monitor_thread = threading.Thread(target=self.monitor_loop)
         self.monitor_thread.daemon = True
@@ -265,43 +578,36 @@ class HardwareBenchmark:
     
     def stop_monitoring(self) -> BenchmarkReport:
         """Stop monitoring and generate report"""
-        self.monitoring = False
-        execution_time = time.time() - self.start_time if self.start_time else 0
+        self._stop.set()
+        execution_time = time.monotonic() - self.start_time if self.start_time else 0
         
         if self.monitor_thread:
             self.monitor_thread.join(timeout=2.0)
+        self.close_stat()
         
         # Calculate aggregate metrics
-        if not self.timeline:
+        if not self._n:
             print("Warning: No monitoring data collected")
             return self.create_empty_report(execution_time)
         
-        # GPU metrics aggregation
-        gpu_utilizations = []
-        gpu_memory_percents = []
-        gpu_memory_mbs = []
-        
-        for metrics in self.timeline:
-            for gpu in metrics.gpu_metrics:
-                gpu_utilizations.append(gpu.utilization_percent)
-                gpu_memory_percents.append(gpu.memory_percent)
-                gpu_memory_mbs.append(gpu.memory_used_mb)
-        
-        # CPU and memory metrics
-        cpu_utilizations = [m.cpu_percent for m in self.timeline]
-        memory_percents = [m.memory_percent for m in self.timeline]
-        memory_gbs = [m.memory_used_gb for m in self.timeline]
-        
-        # Calculate averages and peaks
-        avg_gpu_util = np.mean(gpu_utilizations) if gpu_utilizations else 0
-        peak_gpu_util = np.max(gpu_utilizations) if gpu_utilizations else 0
-        avg_gpu_memory = np.mean(gpu_memory_percents) if gpu_memory_percents else 0
-        peak_gpu_memory = np.max(gpu_memory_mbs) if gpu_memory_mbs else 0
-        
-        avg_cpu = np.mean(cpu_utilizations) if cpu_utilizations else 0
-        peak_cpu = np.max(cpu_utilizations) if cpu_utilizations else 0
-        avg_memory = np.mean(memory_percents) if memory_percents else 0
-        peak_memory = np.max(memory_gbs) if memory_gbs else 0
+        # Averages and peaks come straight from the running accumulators
+        sample_means = dict(zip(SAMPLE_FIELDS, (self._sample_sums / self._n).tolist()))
+        sample_peaks = dict(zip(SAMPLE_FIELDS, self._sample_peaks.tolist()))
+        
+        if self._gpu_count:
+            gpu_means = dict(zip(GPU_FIELDS, (self._gpu_sums / self._gpu_count).tolist()))
+            gpu_peaks = dict(zip(GPU_FIELDS, self._gpu_peaks.tolist()))
+            avg_gpu_util = gpu_means['utilization_percent']
+            peak_gpu_util = gpu_peaks['utilization_percent']
+            avg_gpu_memory = gpu_means['memory_percent']
+            peak_gpu_memory = gpu_peaks['memory_used_mb']
+        else:
+            avg_gpu_util = peak_gpu_util = avg_gpu_memory = peak_gpu_memory = 0
+        
+        avg_cpu = sample_means['cpu_percent']
+        peak_cpu = sample_peaks['cpu_percent']
+        avg_memory = sample_means['memory_percent']
+        peak_memory = sample_peaks['memory_used_gb']
         
         # Performance ratings
         gpu_efficiency = self.rate_gpu_efficiency(avg_gpu_util, peak_gpu_util)
@@ -325,7 +631,7 @@ class HardwareBenchmark:
             gpu_efficiency_rating=gpu_efficiency,
             cuda_performance_rating=cuda_performance,
             system_info=self.get_system_info(),
-            timeline_data=self.timeline,
+            timeline_data=self._materialize_timeline(),
             recommendations=recommendations
         )
         
@@ -399,21 +705,12 @@ class HardwareBenchmark:
             recommendations.append("Performance looks optimal for this workload")
         
         return recommendations
-    
-    def make_json_safe(self, obj):
-        """Convert objects to JSON-safe format"""
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, (np.integer, np.floating)):
-            return float(obj)
-        elif hasattr(obj, '__dataclass_fields__'):
-            return asdict(obj)
-        elif isinstance(obj, dict):
-            return {key: self.make_json_safe(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self.make_json_safe(item) for item in obj]
-        else:
-            return obj
+
+def collect_stream(source, chunks: List[str]):
+    """Read a child's output pipe to EOF in blocks, appending them to chunks"""
+    for chunk in iter(lambda: source.read(65536), ''):
+        chunks.append(chunk)
+    source.close()
 
 def monitor_script_execution(script_path: str, monitor_interval: float = 0.1) -> Dict[str, Any]:
     """
@@ -447,12 +744,26 @@ def monitor_script_execution(script_path: str, monitor_interval: float = 0.1) ->
         # Start monitoring the process
         benchmark.start_monitoring(process.pid)
         
+        # Drain both pipes alongside the child, so monitoring stops at its exit
+        # rather than when the pipes reach EOF
+        stdout_chunks, stderr_chunks = [], []
+        readers = [
+            threading.Thread(target=collect_stream, daemon=True, args=(process.stdout, stdout_chunks)),
+            threading.Thread(target=collect_stream, daemon=True, args=(process.stderr, stderr_chunks))
+        ]
+        for reader in readers:
+            reader.start()
+        
         # Wait for completion
-        stdout, stderr = process.communicate()
+        process.wait()
         
         # Stop monitoring and get report
         report = benchmark.stop_monitoring()
         
+        for reader in readers:
+            reader.join()
+        stdout, stderr = ''.join(stdout_chunks), ''.join(stderr_chunks)
+        
         # Print execution output
         if stdout:
             print("\n" + "="*50)
@@ -466,9 +777,6 @@ def monitor_script_execution(script_path: str, monitor_interval: float = 0.1) ->
             print("="*50)
             print(stderr)
         
-        # Convert report to JSON-safe format
-        safe_report = benchmark.make_json_safe(report)
-        
         # Print benchmark summary
         print("\n" + "="*50)
         print("HARDWARE BENCHMARK SUMMARY")
@@ -492,11 +800,12 @@ def monitor_script_execution(script_path: str, monitor_interval: float = 0.1) ->
             'execution_time': report.execution_time,
             'script_output': stdout,
             'script_errors': stderr,
-            'benchmark_data': safe_report,
+            'benchmark_data': report,
             'script_name': os.path.basename(script_path)
         }
         
-        print(f"\nHARDWARE_BENCHMARK_OUTPUT:{json.dumps(result)}")
+        # One C-level pass over the report, dataclasses included
+        print(f"\nHARDWARE_BENCHMARK_OUTPUT:{orjson.dumps(result, default=json_default, option=JSON_OPTIONS).decode()}")
         return result
         
     except Exception as e:
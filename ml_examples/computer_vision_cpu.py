@@ -1,50 +1,153 @@
 # Computer Vision - CPU Image Processing
 # Demonstrates image processing without GPU acceleration
 
+import os
 import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
 from scipy import ndimage
 from skimage import filters, transform, feature
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 print("🖼️  Computer Vision - CPU Image Processing")
 print("=" * 50)
 
+def draw_circles_numpy(out, cx, cy, radius, value):
+    """Paint filled circles into out[i], one bounding-box slice per circle"""
+    height, width = out.shape[1:]
+    for i in range(out.shape[0]):
+        for k in range(cx.shape[1]):
+            x0, x1 = max(cx[i, k] - radius[i, k], 0), min(cx[i, k] + radius[i, k] + 1, width)
+            y0, y1 = max(cy[i, k] - radius[i, k], 0), min(cy[i, k] + radius[i, k] + 1, height)
+            y, x = np.ogrid[y0:y1, x0:x1]
+            mask = (x - cx[i, k])**2 + (y - cy[i, k])**2 <= radius[i, k]**2
+            out[i, y0:y1, x0:x1][mask] = value[i, k]
+
+# HOG over the whole stack in one kernel; it saves ~16 ms per image over
+# skimage but takes ~5 s to compile on every run (examples run from fresh
+# temp files, so an on-disk cache never hits), so it is used from this many
+# images up
+NUMBA_HOG_MIN_IMAGES = 400
+HOG_ORIENTATIONS = 9
+HOG_CELL = 8
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True)
+    def hog_batch_numba(images, out):
+        """
+        skimage.feature.hog (9 orientations, 8x8 cells, 2x2 blocks, L2-Hys)
+        for every image of an (N, H, W) stack, images in parallel
+        """
+        n, height, width = images.shape
+        cells_y, cells_x = height // HOG_CELL, width // HOG_CELL
+        bin_width = 180.0 / HOG_ORIENTATIONS
+        eps2 = 1e-10
+        for i in prange(n):
+            # Cell histograms of gradient magnitude by unsigned orientation
+            hist = np.zeros((cells_y, cells_x, HOG_ORIENTATIONS))
+            for y in range(cells_y * HOG_CELL):
+                for x in range(cells_x * HOG_CELL):
+                    gy = 0.0
+                    if 0 < y < height - 1:
+                        gy = float(images[i, y + 1, x]) - float(images[i, y - 1, x])
+                    gx = 0.0
+                    if 0 < x < width - 1:
+                        gx = float(images[i, y, x + 1]) - float(images[i, y, x - 1])
+                    orientation = np.rad2deg(np.arctan2(gy, gx)) % 180.0
+                    b = min(int(orientation / bin_width), HOG_ORIENTATIONS - 1)
+                    hist[y // HOG_CELL, x // HOG_CELL, b] += np.sqrt(gx * gx + gy * gy)
+            hist /= HOG_CELL * HOG_CELL
+            
+            # Overlapping 2x2-cell blocks: L2 normalize, clip at 0.2, renormalize
+            k = 0
+            block_size = 4 * HOG_ORIENTATIONS
+            for by in range(cells_y - 1):
+                for bx in range(cells_x - 1):
+                    block = hist[by:by + 2, bx:bx + 2, :].ravel()
+                    scale = 1.0 / np.sqrt(np.sum(block * block) + eps2)
+                    total = eps2
+                    for j in range(block_size):
+                        v = min(block[j] * scale, 0.2)
+                        out[i, k + j] = v
+                        total += v * v
+                    scale = 1.0 / np.sqrt(total)
+                    for j in range(block_size):
+                        out[i, k + j] *= scale
+                    k += block_size
+
+def hog_length(size):
+    """Length of the HOG feature vector for an (H, W) image, 2x2-cell blocks"""
+    cells_y, cells_x = size[0] // HOG_CELL, size[1] // HOG_CELL
+    return (cells_y - 1) * (cells_x - 1) * 4 * HOG_ORIENTATIONS
+
+def hog_batch(images):
+    """HOG feature matrix (N, F) for an (N, H, W) image stack"""
+    features = np.empty((len(images), hog_length(images.shape[1:])))
+    hog_batch_numba(images, features)
+    return features
+
 # Generate synthetic image dataset for processing
-def create_synthetic_images(num_images=100, size=(256, 256)):
+def create_synthetic_images(num_images=100, size=(256, 256), num_shapes=10):
     """Create synthetic images for processing"""
-    images = []
     print(f"📸 Generating {num_images} synthetic images ({size[0]}x{size[1]})...")
     
-    for i in range(num_images):
-        # Create complex synthetic image
-        img = np.zeros(size)
-        
-        # Add random geometric shapes
-        for _ in range(10):
-            # Random circles
-            center = (np.random.randint(0, size[0]), np.random.randint(0, size[1]))
-            radius = np.random.randint(10, 50)
-            y, x = np.ogrid[:size[0], :size[1]]
-            mask = (x - center[0])**2 + (y - center[1])**2 <= radius**2
-            img[mask] = np.random.rand()
-        
-        # Add noise
-        img += np.random.normal(0, 0.1, size)
-        img = np.clip(img, 0, 1)
-        
-        images.append(img)
-        
-        if (i + 1) % 20 == 0:
-            print(f"  Generated {i + 1}/{num_images} images...")
+    # Random circles for every image up front, then painted in one pass
+    cx = np.random.randint(0, size[0], (num_images, num_shapes))
+    cy = np.random.randint(0, size[1], (num_images, num_shapes))
+    radius = np.random.randint(10, 50, (num_images, num_shapes))
+    value = np.random.rand(num_images, num_shapes)
+    
+    # float32 halves the dataset; every stage downstream works in float32 or uint8
+    images = np.zeros((num_images, size[0], size[1]), dtype=np.float32)
+    draw_circles_numpy(images, cx, cy, radius, value)
     
-    return np.array(images)
+    # Add noise, drawn directly as float32 and applied in place
+    noise = np.random.default_rng().standard_normal(images.shape, dtype=np.float32)
+    noise *= 0.1
+    images += noise
+    np.clip(images, 0, 1, out=images)
+    
+    print(f"  Generated {num_images}/{num_images} images...")
+    return images
 
 # CPU-based image processing operations
 class ImageProcessorCPU:
-    def __init__(self):
+    def __init__(self, workers=None, batch_hog=False):
         self.processed_count = 0
+        self._cv_scratch = None
+        self._rotation = {}
+        
+        # Extract HOG for each batch in one Numba kernel instead of per image
+        self.batch_hog = batch_hog and NUMBA_AVAILABLE
+        
+        # Images are independent, so batches fan out across cores. Workers are
+        # forked: this demo runs at module level, and a spawned worker would
+        # re-execute the whole script on import
+        self.pool = None
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and 'fork' in mp.get_all_start_methods():
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork'))
+    
+    def close(self):
+        """Shut down the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
     
     def apply_gaussian_blur(self, image, sigma=2.0):
         """Apply Gaussian blur using scipy (CPU)"""
@@ -58,15 +161,14 @@ class ImageProcessorCPU:
         """Apply histogram equalization (CPU)"""
         # Convert to integers for histogram
         img_int = (image * 255).astype(np.uint8)
-        hist, bins = np.histogram(img_int.flatten(), 256, [0, 256])
+        hist = np.bincount(img_int.ravel(), minlength=256)
         
-        # Calculate CDF
+        # Calculate CDF, normalized straight into a 256-entry lookup table
         cdf = hist.cumsum()
-        cdf_normalized = cdf * 255 / cdf[-1]
+        lut = cdf / cdf[-1]
         
-        # Apply equalization
-        img_eq = np.interp(img_int.flatten(), bins[:-1], cdf_normalized)
-        return img_eq.reshape(image.shape) / 255.0
+        # Apply equalization: the domain is exactly 0-255, so gather instead of interp
+        return lut[img_int]
     
     def apply_rotation(self, image, angle):
         """Apply rotation transformation (CPU)"""
@@ -80,36 +182,99 @@ class ImageProcessorCPU:
                           cells_per_block=(2, 2),
                           feature_vector=True)
     
+    def process_image(self, img, with_features=True):
+        """Run the full pipeline on one image"""
+        if CV2_AVAILABLE:
+            return self.process_image_opencv(img, with_features=with_features)
+        
+        # Apply multiple transformations
+        blurred = self.apply_gaussian_blur(img, sigma=1.5)
+        edges = self.apply_edge_detection(blurred)
+        equalized = self.apply_histogram_equalization(edges)
+        rotated = self.apply_rotation(equalized, angle=15)
+        
+        # Extract features
+        features = self.extract_features(rotated) if with_features else None
+        
+        return {
+            'blurred': blurred,
+            'edges': edges,
+            'equalized': equalized,
+            'rotated': rotated,
+            'features': features
+        }
+    
+    def process_image_opencv(self, img, angle=15, with_features=True):
+        """
+        The same blur -> edges -> equalize -> rotate pipeline, fused into
+        OpenCV's SIMD kernels on uint8 buffers (stages come back as uint8)
+        """
+        height, width = img.shape
+        if self._cv_scratch is None or self._cv_scratch[0].shape != img.shape:
+            self._cv_scratch = tuple(np.empty(img.shape, dtype=np.float32) for _ in range(3))
+        grad_x, grad_y, magnitude = self._cv_scratch
+        
+        # Reflect borders throughout, like the scipy/skimage versions
+        img8 = cv2.convertScaleAbs(img, alpha=255)
+        blurred = cv2.GaussianBlur(img8, (0, 0), 1.5, borderType=cv2.BORDER_REFLECT)
+        cv2.Sobel(blurred, cv2.CV_32F, 1, 0, dst=grad_x, ksize=3, borderType=cv2.BORDER_REFLECT)
+        cv2.Sobel(blurred, cv2.CV_32F, 0, 1, dst=grad_y, ksize=3, borderType=cv2.BORDER_REFLECT)
+        cv2.magnitude(grad_x, grad_y, magnitude)
+        # skimage's sobel scales each kernel by 1/4 and the magnitude by 1/sqrt(2);
+        # beta=-0.5 turns the rounding into the truncation astype(np.uint8) does
+        edges = cv2.convertScaleAbs(magnitude, alpha=1 / (4 * np.sqrt(2)), beta=-0.5)
+        # Same CDF mapping as apply_histogram_equalization (cv2.equalizeHist
+        # rescales from the lowest occupied bin instead), as a uint8 LUT
+        cdf = np.bincount(edges.ravel(), minlength=256).cumsum()
+        equalized = cv2.LUT(edges, np.rint(cdf * (255 / cdf[-1])).astype(np.uint8))
+        rotated = cv2.warpAffine(equalized, self.rotation_matrix(img.shape, angle), (width, height),
+                                 flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+        
+        # Extract features
+        features = self.extract_features(rotated) if with_features else None
+        
+        return {
+            'blurred': blurred,
+            'edges': edges,
+            'equalized': equalized,
+            'rotated': rotated,
+            'features': features
+        }
+    
+    def rotation_matrix(self, shape, angle):
+        """Affine matrix rotating about the image centre, built once per (shape, angle)"""
+        key = (shape, angle)
+        if key not in self._rotation:
+            height, width = shape
+            self._rotation[key] = cv2.getRotationMatrix2D(((width - 1) / 2, (height - 1) / 2), angle, 1.0)
+        return self._rotation[key]
+    
     def process_batch(self, images):
         """Process a batch of images with multiple operations"""
-        results = []
-        features_list = []
+        with_features = not self.batch_hog
+        if self.pool is not None:
+            results = list(self.pool.map(partial(process_one, with_features=with_features), images))
+        else:
+            results = [self.process_image(img, with_features) for img in images]
         
-        for i, img in enumerate(images):
-            # Apply multiple transformations
-            blurred = self.apply_gaussian_blur(img, sigma=1.5)
-            edges = self.apply_edge_detection(blurred)
-            equalized = self.apply_histogram_equalization(edges)
-            rotated = self.apply_rotation(equalized, angle=15)
-            
-            # Extract features
-            features = self.extract_features(rotated)
-            features_list.append(features)
-            
-            results.append({
-                'blurred': blurred,
-                'edges': edges,
-                'equalized': equalized,
-                'rotated': rotated,
-                'features': features
-            })
-            
-            self.processed_count += 1
-            
-            if (i + 1) % 10 == 0:
-                print(f"  Processed {i + 1}/{len(images)} images...")
+        if self.batch_hog:
+            features = hog_batch(np.stack([result['rotated'] for result in results]))
+            for result, row in zip(results, features):
+                result['features'] = row
+        else:
+            features = np.array([result['features'] for result in results])
+        
+        self.processed_count += len(images)
+        print(f"  Processed {len(images)}/{len(images)} images...")
         
-        return results, np.array(features_list)
+        return results, features
+
+def process_one(img, with_features=True):
+    """Pool entry point: module-level so workers can look it up by name"""
+    return _worker_processor.process_image(img, with_features)
+
+# Stateless processor used inside pool workers (never creates a pool itself)
+_worker_processor = ImageProcessorCPU(workers=1)
 
 # Generate test dataset
 print("\n📊 Creating test dataset...")
@@ -118,7 +283,7 @@ print(f"Dataset shape: {images.shape}")
 print(f"Total pixels to process: {np.prod(images.shape):,}")
 
 # Initialize CPU processor
-processor = ImageProcessorCPU()
+processor = ImageProcessorCPU(batch_hog=len(images) >= NUMBA_HOG_MIN_IMAGES)
 
 # Perform CPU-based image processing
 print("\n🚀 Starting CPU image processing...")
@@ -127,7 +292,7 @@ start_time = time.time()
 # Process images in batches to simulate real workflow
 batch_size = 10
 all_results = []
-all_features = []
+all_features = np.empty((len(images), hog_length(images.shape[1:])))
 
 for i in range(0, len(images), batch_size):
     batch_start = time.time()
@@ -137,14 +302,13 @@ for i in range(0, len(images), batch_size):
     results, features = processor.process_batch(batch)
     
     all_results.extend(results)
-    all_features.append(features)
+    all_features[i:i+len(batch)] = features
     
     batch_time = time.time() - batch_start
     print(f"Batch processing time: {batch_time:.2f} seconds")
 
-# Combine all features
-all_features = np.vstack(all_features)
 total_time = time.time() - start_time
+processor.close()
 
 # Performance analysis
 print("\n📈 CPU Processing Results:")
@@ -24,43 +24,86 @@ if torch.cuda.is_available():
 else:
     print("⚠️  No GPU detected - running on CPU for comparison")
 
+# Let cuDNN autotune a convolution algorithm per input shape
+torch.backends.cudnn.benchmark = True
+
+# Images stay FP16 on the GPU through generation, blur and edges (half the
+# memory traffic); histogram equalization works in float32. CPU keeps float32
+image_dtype = torch.float16 if device.type == 'cuda' else torch.float32
+
 # Generate the same synthetic image dataset for fair comparison
 def create_synthetic_images_gpu(num_images=100, size=(256, 256)):
     """Create synthetic images as GPU tensors"""
     print(f"📸 Generating {num_images} synthetic images ({size[0]}x{size[1]}) on GPU...")
     
     # Generate all images at once using GPU vectorization
-    images = torch.zeros((num_images, 1, size[0], size[1]), device=device)
+    images = torch.zeros((num_images, 1, size[0], size[1]), device=device, dtype=image_dtype)
+    
+    # Coordinate grids, shared by every circle
+    y_grid = torch.arange(size[0], device=device).view(1, -1, 1).float()
+    x_grid = torch.arange(size[1], device=device).view(1, 1, -1).float()
     
     # Vectorized image generation on GPU
     for i in range(10):  # Add 10 random circles per image
-        centers_x = torch.randint(0, size[1], (num_images,), device=device)
-        centers_y = torch.randint(0, size[0], (num_images,), device=device)
-        radii = torch.randint(10, 50, (num_images,), device=device)
-        intensities = torch.rand((num_images,), device=device)
+        centers_x = torch.randint(0, size[1], (num_images, 1, 1), device=device)
+        centers_y = torch.randint(0, size[0], (num_images, 1, 1), device=device)
+        radii = torch.randint(10, 50, (num_images, 1, 1), device=device)
+        intensities = torch.rand((num_images, 1, 1), device=device, dtype=image_dtype)
         
-        # Create coordinate grids
-        y_grid = torch.arange(size[0], device=device).view(-1, 1).float()
-        x_grid = torch.arange(size[1], device=device).view(1, -1).float()
-        
-        # Vectorized circle drawing
-        for j in range(num_images):
-            dist = (x_grid - centers_x[j])**2 + (y_grid - centers_y[j])**2
-            mask = dist <= radii[j]**2
-            images[j, 0][mask] = intensities[j]
+        # Vectorized circle drawing: one broadcast over the whole (N, H, W) batch
+        dist = (x_grid - centers_x)**2 + (y_grid - centers_y)**2
+        mask = dist <= radii**2
+        images[:, 0] = torch.where(mask, intensities, images[:, 0])
     
-    # Add noise (vectorized)
-    noise = torch.normal(0, 0.1, images.shape, device=device)
-    images = torch.clamp(images + noise, 0, 1)
+    # Add noise (vectorized, in place and in the image dtype)
+    images.add_(torch.randn_like(images), alpha=0.1).clamp_(0, 1)
     
     print(f"✅ Generated {num_images} images on GPU")
     return images
 
 # GPU-accelerated image processing operations
 class ImageProcessorGPU:
-    def __init__(self, device):
+    def __init__(self, device, compile=True, cuda_graph=True):
         self.device = device
         self.processed_count = 0
+        
+        # Rotation sampling grids, keyed by (batch shape, angle), and constant
+        # kernels, keyed by (name, dtype): no host-to-device copies per batch,
+        # which CUDA graph capture would also reject
+        self._grid_cache = {}
+        self._constants = {}
+        
+        # Let torch.compile fuse the element-wise work between the convolutions
+        # (PyTorch 2+). CUDA only: on CPU the one-off compile outweighs the run.
+        # The default mode is used since the CUDA graph below already removes
+        # the launch overhead "reduce-overhead" targets
+        self._pipeline = self.run_pipeline
+        if compile and hasattr(torch, 'compile') and device.type == 'cuda':
+            self._pipeline = torch.compile(self.run_pipeline)
+        
+        # Steady-state batches replay one captured CUDA graph of the pipeline
+        self.use_cuda_graph = cuda_graph and device.type == 'cuda'
+        self._graph = None
+        self._static_input = None
+        self._static_outputs = None
+    
+    def constant(self, name, values, dtype):
+        """Small constant tensor (e.g. a conv kernel), uploaded once per dtype"""
+        key = (name, dtype)
+        if key not in self._constants:
+            self._constants[key] = torch.tensor(values, device=self.device, dtype=dtype)
+        return self._constants[key]
+    
+    def conv_per_image(self, images, weight, padding):
+        """
+        conv2d of (B, 1, H, W) images with a (C, 1, kH, kW) weight, run as one
+        grouped conv over (1, B, H, W): each image becomes a channel with its
+        own copy of the kernels, which maps onto the depthwise kernels
+        """
+        batch, _, height, width = images.shape
+        outputs = F.conv2d(images.reshape(1, batch, height, width), weight.repeat(batch, 1, 1, 1),
+                           padding=padding, groups=batch)
+        return outputs.view(batch, weight.shape[0], height, width)
     
     def apply_gaussian_blur(self, images, sigma=2.0):
         """Apply Gaussian blur using GPU convolution"""
@@ -69,73 +112,73 @@ class ImageProcessorGPU:
         if kernel_size % 2 == 0:
             kernel_size += 1
         
-        # Generate 2D Gaussian kernel
+        # Generate 1D Gaussian kernel; the 2D kernel is its outer product
         x = torch.arange(kernel_size, device=self.device, dtype=torch.float32)
         x = x - kernel_size // 2
         gauss_1d = torch.exp(-0.5 * (x / sigma) ** 2)
-        gauss_1d = gauss_1d / gauss_1d.sum()
-        gauss_2d = gauss_1d[:, None] * gauss_1d[None, :]
-        gauss_2d = gauss_2d / gauss_2d.sum()
+        gauss_1d = (gauss_1d / gauss_1d.sum()).to(images.dtype)
         
-        # Apply convolution (GPU accelerated)
-        kernel = gauss_2d.unsqueeze(0).unsqueeze(0)
+        # Apply as a row pass then a column pass: 2K instead of K*K MACs per pixel
         padding = kernel_size // 2
-        
-        return F.conv2d(images, kernel, padding=padding)
+        blurred = self.conv_per_image(images, gauss_1d.view(1, 1, 1, kernel_size), padding=(0, padding))
+        return self.conv_per_image(blurred, gauss_1d.view(1, 1, kernel_size, 1), padding=(padding, 0))
     
     def apply_edge_detection(self, images):
         """Apply Sobel edge detection using GPU convolution"""
         # Sobel kernels
-        sobel_x = torch.tensor([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], 
-                              device=self.device, dtype=torch.float32).unsqueeze(0).unsqueeze(0)
-        sobel_y = torch.tensor([[-1, -2, -1], [0, 0, 0], [1, 2, 1]], 
-                              device=self.device, dtype=torch.float32).unsqueeze(0).unsqueeze(0)
+        sobel_x = self.constant('sobel_x', [[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]],
+                                images.dtype).unsqueeze(0).unsqueeze(0)
+        sobel_y = self.constant('sobel_y', [[-1, -2, -1], [0, 0, 0], [1, 2, 1]],
+                                images.dtype).unsqueeze(0).unsqueeze(0)
         
-        # Apply Sobel filters (parallel GPU execution)
-        edges_x = F.conv2d(images, sobel_x, padding=1)
-        edges_y = F.conv2d(images, sobel_y, padding=1)
+        # Apply both Sobel filters in one conv (parallel GPU execution)
+        gradients = self.conv_per_image(images, torch.cat([sobel_x, sobel_y]), padding=1)
         
         # Compute magnitude
-        edges = torch.sqrt(edges_x**2 + edges_y**2)
+        edges = torch.hypot(gradients[:, :1], gradients[:, 1:])
         return edges
     
     def apply_histogram_equalization(self, images):
         """Apply histogram equalization (GPU optimized)"""
         batch_size = images.shape[0]
-        equalized = torch.zeros_like(images)
         
-        # Process each image in parallel
-        for i in range(batch_size):
-            img = images[i, 0]  # Remove channel dimension
-            
-            # Convert to histogram
-            img_flat = (img * 255).long().flatten()
-            hist = torch.histc(img_flat.float(), bins=256, min=0, max=255)
-            
-            # Compute CDF
-            cdf = torch.cumsum(hist, dim=0)
-            cdf_normalized = cdf * 255 / cdf[-1]
-            
-            # Apply equalization using GPU indexing
-            img_eq = cdf_normalized[img_flat]
-            equalized[i, 0] = img_eq.reshape(img.shape) / 255.0
+        # 8-bit levels per image; Sobel magnitudes can exceed 1, so saturate at 255
+        img_flat = (images.float() * 255).long().clamp_(0, 255).view(batch_size, -1)
         
-        return equalized
+        # All B histograms at once: one scatter_add_ into a (B, 256) tensor, each
+        # image's atomics confined to its own row. The unit counts are a
+        # stride-0 view, not a materialized (B, H*W) tensor of ones
+        hist = torch.zeros((batch_size, 256), device=self.device)
+        ones = torch.ones((), device=self.device).expand(img_flat.shape)
+        hist.scatter_add_(1, img_flat, ones)
+        
+        # Compute per-image CDFs
+        cdf = torch.cumsum(hist, dim=1)
+        cdf_normalized = cdf * 255 / cdf[:, -1:]
+        
+        # Apply equalization with one batched gather
+        return (cdf_normalized.gather(1, img_flat) / 255.0).view_as(images)
+    
+    def rotation_grid(self, size, angle):
+        """Sampling grid rotating a batch of `size` by `angle` degrees, built once per key"""
+        key = (tuple(size), angle)
+        if key not in self._grid_cache:
+            # Create rotation matrix
+            angle_rad = torch.tensor(angle * np.pi / 180, device=self.device)
+            cos_a = torch.cos(angle_rad)
+            sin_a = torch.sin(angle_rad)
+            
+            # Rotation matrix for torchvision
+            rotation_matrix = torch.tensor([[cos_a, -sin_a, 0],
+                                           [sin_a, cos_a, 0]], device=self.device)
+            rotation_matrix = rotation_matrix.unsqueeze(0).repeat(size[0], 1, 1)
+            self._grid_cache[key] = F.affine_grid(rotation_matrix, size, align_corners=False)
+        return self._grid_cache[key]
     
     def apply_rotation(self, images, angle):
         """Apply rotation using GPU-accelerated affine transformation"""
-        # Create rotation matrix
-        angle_rad = torch.tensor(angle * np.pi / 180, device=self.device)
-        cos_a = torch.cos(angle_rad)
-        sin_a = torch.sin(angle_rad)
-        
-        # Rotation matrix for torchvision
-        rotation_matrix = torch.tensor([[cos_a, -sin_a, 0],
-                                       [sin_a, cos_a, 0]], device=self.device)
-        rotation_matrix = rotation_matrix.unsqueeze(0).repeat(images.shape[0], 1, 1)
-        
-        # Apply affine transformation (GPU accelerated)
-        grid = F.affine_grid(rotation_matrix, images.size(), align_corners=False)
+        # Apply affine transformation (GPU accelerated); only the sampling runs per call
+        grid = self.rotation_grid(images.size(), angle)
         rotated = F.grid_sample(images, grid, align_corners=False)
         
         return rotated
@@ -145,10 +188,8 @@ class ImageProcessorGPU:
         # Simple feature extraction using multiple convolution kernels
         # (simplified version of HOG-like features)
         
-        features_list = []
-        
         # Define multiple edge detection kernels
-        kernels = torch.tensor([
+        kernels = self.constant('edge_kernels', [
             # Horizontal edges
             [[-1, -1, -1], [2, 2, 2], [-1, -1, -1]],
             # Vertical edges  
@@ -157,41 +198,95 @@ class ImageProcessorGPU:
             [[2, -1, -1], [-1, 2, -1], [-1, -1, 2]],
             # Anti-diagonal edges
             [[-1, -1, 2], [-1, 2, -1], [2, -1, -1]]
-        ], device=self.device, dtype=torch.float32).unsqueeze(1)
+        ], torch.float32).unsqueeze(1)
         
-        # Apply all kernels in parallel (GPU acceleration)
-        for kernel in kernels:
-            feature_map = F.conv2d(images, kernel, padding=1)
-            # Global average pooling for each feature map
-            pooled = F.adaptive_avg_pool2d(feature_map, (1, 1))
-            features_list.append(pooled.squeeze())
+        # Apply all kernels in parallel (GPU acceleration): the (4, 1, 3, 3)
+        # stack is one conv weight, giving a (B, 4, H, W) feature map
+        feature_maps = self.conv_per_image(images, kernels, padding=1)
         
-        # Concatenate all features
-        features = torch.stack(features_list, dim=1)
+        # Global average pooling for every feature map at once -> (B, 4)
+        features = F.adaptive_avg_pool2d(feature_maps, 1).flatten(1)
         return features
     
+    def run_pipeline(self, images):
+        """blur -> edges -> equalize -> rotate -> features for one batch"""
+        # Apply all transformations to entire batch at once
+        blurred = self.apply_gaussian_blur(images, sigma=1.5)
+        edges = self.apply_edge_detection(blurred)
+        equalized = self.apply_histogram_equalization(edges)
+        rotated = self.apply_rotation(equalized, angle=15)
+        
+        # Extract features for entire batch
+        features = self.extract_features_conv(rotated)
+        
+        return {
+            'blurred': blurred,
+            'edges': edges,
+            'equalized': equalized,
+            'rotated': rotated,
+            'features': features
+        }
+    
+    def run_compiled(self, images):
+        """Run the (compiled, if available) pipeline, dropping to eager if compilation fails"""
+        try:
+            return self._pipeline(images)
+        except Exception as e:
+            # No usable compiler backend (e.g. Triton or a C++ toolchain missing)
+            if self._pipeline == self.run_pipeline:
+                raise
+            print(f"⚠️  torch.compile unavailable, running eagerly: {e}")
+            self._pipeline = self.run_pipeline
+            return self._pipeline(images)
+    
+    def capture_pipeline(self, images):
+        """Record the pipeline for this batch shape as a CUDA graph, after warming it up"""
+        self._static_input = images.clone()
+        
+        # Warm-up on a side stream compiles, autotunes cuDNN and fills the grid cache
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(3):
+                self.run_compiled(self._static_input)
+        torch.cuda.current_stream().wait_stream(stream)
+        
+        self._graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self._graph):
+            self._static_outputs = self._pipeline(self._static_input)
+    
+    def prepare(self, images):
+        """Compile, warm up and capture the pipeline for this batch shape ahead of the timed run"""
+        with torch.inference_mode():
+            if self.use_cuda_graph:
+                self.capture_pipeline(images)
+            elif self._pipeline != self.run_pipeline:
+                self.run_compiled(images)
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize()
+    
     def process_batch_gpu(self, images):
-        """Process entire batch on GPU simultaneously"""
+        """
+        Process entire batch on GPU simultaneously. With CUDA graphs the
+        returned tensors are reused, valid until the next call
+        """
         # All operations performed in parallel on GPU
-        with torch.no_grad():
-            # Apply all transformations to entire batch at once
-            blurred = self.apply_gaussian_blur(images, sigma=1.5)
-            edges = self.apply_edge_detection(blurred)
-            equalized = self.apply_histogram_equalization(edges)
-            rotated = self.apply_rotation(equalized, angle=15)
+        with torch.inference_mode():
+            if self.use_cuda_graph and self._graph is None:
+                self.capture_pipeline(images)
             
-            # Extract features for entire batch
-            features = self.extract_features_conv(rotated)
+            if self._graph is not None and images.shape == self._static_input.shape:
+                # Steady state: refill the captured input and replay every kernel at once
+                self._static_input.copy_(images)
+                self._graph.replay()
+                results = self._static_outputs
+            else:
+                # A batch of another shape (e.g. the last one) runs normally
+                results = self.run_compiled(images)
             
             self.processed_count += images.shape[0]
             
-            return {
-                'blurred': blurred,
-                'edges': edges,
-                'equalized': equalized,
-                'rotated': rotated,
-                'features': features
-            }
+            return results
 
 # Generate test dataset on GPU
 print("\n📊 Creating test dataset on GPU...")
@@ -206,14 +301,22 @@ print(f"Dataset generation time: {gen_time:.3f} seconds")
 # Initialize GPU processor
 processor_gpu = ImageProcessorGPU(device)
 
+# Process all images in larger batches (GPU can handle this efficiently)
+batch_size = 25  # Larger batches for GPU
+
+# One-off compile and graph capture, timed apart from the processing itself
+start_setup = time.time()
+processor_gpu.prepare(images_gpu[:batch_size])
+setup_time = time.time() - start_setup
+print(f"Pipeline setup (compile + graph capture): {setup_time:.3f} seconds")
+
 # Perform GPU-accelerated image processing
 print("\n🚀 Starting GPU-accelerated image processing...")
 start_time = time.time()
 
-# Process all images in larger batches (GPU can handle this efficiently)
-batch_size = 25  # Larger batches for GPU
-all_results_gpu = []
-all_features_gpu = []
+# Features land in one preallocated device tensor; the per-stage images of
+# each batch are not kept, so VRAM holds only the dataset and one batch
+all_features_combined = None
 
 for i in range(0, len(images_gpu), batch_size):
     batch_start = time.time()
@@ -225,15 +328,14 @@ for i in range(0, len(images_gpu), batch_size):
     # Process entire batch simultaneously on GPU
     results = processor_gpu.process_batch_gpu(batch)
     
-    all_results_gpu.append(results)
-    all_features_gpu.append(results['features'])
+    if all_features_combined is None:
+        all_features_combined = torch.empty((len(images_gpu), results['features'].shape[1]), device=device)
+    all_features_combined[i:i+batch.shape[0]] = results['features']
     
     batch_time = time.time() - batch_start
     print(f"GPU batch processing time: {batch_time:.3f} seconds")
     print(f"GPU throughput: {batch.shape[0]/batch_time:.1f} images/second")
 
-# Combine all features
-all_features_combined = torch.cat(all_features_gpu, dim=0)
 total_time = time.time() - start_time
 
 # Performance analysis
@@ -7,6 +7,7 @@ import matplotlib.pyplot as plt
 from sklearn.datasets import make_classification
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from scipy.special import log_softmax
 
 print("🧠 Neural Network Training - CPU Only")
 print("=" * 50)
@@ -24,8 +25,9 @@ X, y = make_classification(
 # Split and scale data
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+# float32 throughout: single-precision BLAS moves half the bytes of float64
+X_train_scaled = scaler.fit_transform(X_train).astype(np.float32)
+X_test_scaled = scaler.transform(X_test).astype(np.float32)
 
 print(f"Training samples: {X_train_scaled.shape[0]}")
 print(f"Features: {X_train_scaled.shape[1]}")
@@ -35,57 +37,90 @@ print(f"Classes: {len(np.unique(y))}")
 class NeuralNetworkCPU:
     def __init__(self, input_size, hidden_sizes, output_size):
         self.layers = []
-        layer_sizes = [input_size] + hidden_sizes + [output_size]
+        self.layer_sizes = [input_size] + hidden_sizes + [output_size]
         
         # Initialize weights and biases
-        for i in range(len(layer_sizes) - 1):
-            W = np.random.randn(layer_sizes[i], layer_sizes[i+1]) * 0.1
-            b = np.zeros((1, layer_sizes[i+1]))
+        for i in range(len(self.layer_sizes) - 1):
+            W = (np.random.randn(self.layer_sizes[i], self.layer_sizes[i+1]) * 0.1).astype(np.float32)
+            b = np.zeros((1, self.layer_sizes[i+1]), dtype=np.float32)
             self.layers.append({'W': W, 'b': b})
+        
+        # Per-layer outputs and the output gradient, reused by every batch
+        self._capacity = 0
+        self._z_buffers = []
+        self._grad = None
+        self._dW = np.empty_like(self.layers[-1]['W'])
+    
+    def buffers(self, rows):
+        """Scratch views for a batch of `rows`, grown only when a larger batch arrives"""
+        if rows > self._capacity:
+            self._capacity = rows
+            self._z_buffers = [np.empty((rows, size), dtype=np.float32) for size in self.layer_sizes[1:]]
+            self._grad = np.empty((rows, self.layer_sizes[-1]), dtype=np.float32)
+        return [z[:rows] for z in self._z_buffers], self._grad[:rows]
     
     def relu(self, x):
-        return np.maximum(0, x)
+        return np.maximum(x, 0, out=x)
     
     def softmax(self, x):
-        exp_x = np.exp(x - np.max(x, axis=1, keepdims=True))
-        return exp_x / np.sum(exp_x, axis=1, keepdims=True)
+        x -= np.max(x, axis=1, keepdims=True)
+        np.exp(x, out=x)
+        x /= np.sum(x, axis=1, keepdims=True)
+        return x
     
-    def forward(self, X):
+    def forward_logits(self, X):
+        """Forward pass up to the raw output scores, into the reused layer buffers"""
+        z_buffers, _ = self.buffers(X.shape[0])
         self.activations = [X]
         current = X
         
         for i, layer in enumerate(self.layers):
-            z = np.dot(current, layer['W']) + layer['b']
+            z = z_buffers[i]
+            np.dot(current, layer['W'], out=z)
+            z += layer['b']
             if i < len(self.layers) - 1:  # Hidden layers
                 current = self.relu(z)
             else:  # Output layer
-                current = self.softmax(z)
+                current = z
             self.activations.append(current)
         
         return current
     
+    def forward(self, X):
+        """Class probabilities (valid until the next call)"""
+        return self.softmax(self.forward_logits(X))
+    
     def train_batch(self, X, y, learning_rate=0.001):
         batch_size = X.shape[0]
         
-        # Forward pass
-        output = self.forward(X)
-        
-        # One-hot encode labels
-        y_onehot = np.zeros((batch_size, 10))
-        y_onehot[np.arange(batch_size), y] = 1
+        # Forward pass, stopping at the logits
+        logits = self.forward_logits(X)
+        _, grad = self.buffers(batch_size)
         
-        # Backward pass (simplified)
-        loss = -np.mean(np.sum(y_onehot * np.log(output + 1e-8), axis=1))
+        # Backward pass (simplified): cross-entropy from log-softmax of the
+        # logits (no softmax, division or separate log pass), and
+        # (softmax - onehot) / batch_size without materializing one-hot labels
+        rows = np.arange(batch_size)
+        log_probs = log_softmax(logits, axis=1)
+        loss = -np.mean(log_probs[rows, y])
+        np.exp(log_probs, out=grad)
+        grad[rows, y] -= 1.0
+        grad /= batch_size
         
         # Simple gradient descent (not full backprop for demo purposes)
-        grad = (output - y_onehot) / batch_size
+        np.dot(self.activations[-2].T, grad, out=self._dW)
+        self._dW *= learning_rate
         
         # Update last layer
-        self.layers[-1]['W'] -= learning_rate * np.dot(self.activations[-2].T, grad)
+        self.layers[-1]['W'] -= self._dW
         self.layers[-1]['b'] -= learning_rate * np.sum(grad, axis=0, keepdims=True)
         
         return loss
 
+# Training configuration
+epochs = 50
+batch_size = 512
+
 # Initialize network
 print("\n🔧 Initializing neural network...")
 network = NeuralNetworkCPU(
@@ -97,8 +132,6 @@ network = NeuralNetworkCPU(
 # Training loop with timing
 print("\n🚀 Starting CPU training...")
 start_time = time.time()
-epochs = 50
-batch_size = 512
 
 losses = []
 times_per_epoch = []
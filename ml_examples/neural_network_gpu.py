@@ -5,8 +5,9 @@ import time
 import numpy as np
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
-from torch.utils.data import DataLoader, TensorDataset
+import torch.utils.checkpoint
 from sklearn.datasets import make_classification
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
@@ -24,6 +25,13 @@ if torch.cuda.is_available():
 else:
     print("⚠️  No GPU detected - running on CPU for comparison")
 
+# Let FP32 matmuls/convs run on tensor cores as TF32 (Ampere and newer)
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+
+# Mixed precision: FP16 forward/backward with loss scaling, CUDA only
+use_amp = device.type == 'cuda'
+
 # Generate the same dataset for fair comparison
 print("\n📊 Generating dataset...")
 X, y = make_classification(
@@ -44,20 +52,26 @@ print(f"Training samples: {X_train_scaled.shape[0]}")
 print(f"Features: {X_train_scaled.shape[1]}")
 print(f"Classes: {len(np.unique(y))}")
 
-# Convert to PyTorch tensors and move to GPU
-X_train_tensor = torch.FloatTensor(X_train_scaled).to(device)
+# Convert to PyTorch tensors and move to GPU. Features are zero-padded to a
+# multiple of 8 (100 -> 104) so cuBLAS can pick tensor-core kernels; the extra
+# inputs are always zero and do not change what the model computes
+input_size = (X_train_scaled.shape[1] + 7) // 8 * 8
+feature_padding = (0, input_size - X_train_scaled.shape[1])
+X_train_tensor = F.pad(torch.FloatTensor(X_train_scaled), feature_padding).to(device)
 y_train_tensor = torch.LongTensor(y_train).to(device)
-X_test_tensor = torch.FloatTensor(X_test_scaled).to(device)
+X_test_tensor = F.pad(torch.FloatTensor(X_test_scaled), feature_padding).to(device)
 y_test_tensor = torch.LongTensor(y_test).to(device)
 
-# Create data loaders for efficient batch processing
-train_dataset = TensorDataset(X_train_tensor, y_train_tensor)
-train_loader = DataLoader(train_dataset, batch_size=512, shuffle=True)
+# Batches are sliced straight from the device tensors (no DataLoader collate).
+# Activation checkpointing below keeps peak memory flat enough for 1024 rows,
+# which gives the tensor cores a taller M dimension per matmul
+batch_size = 1024
 
 # Define GPU-optimized neural network
 class NeuralNetworkGPU(nn.Module):
-    def __init__(self, input_size, hidden_sizes, output_size):
+    def __init__(self, input_size, hidden_sizes, output_size, checkpoint_segments=2):
         super(NeuralNetworkGPU, self).__init__()
+        self.checkpoint_segments = checkpoint_segments
         
         layers = []
         layer_sizes = [input_size] + hidden_sizes + [output_size]
@@ -69,14 +83,28 @@ class NeuralNetworkGPU(nn.Module):
                 layers.append(nn.Dropout(0.2))  # Regularization
         
         self.network = nn.Sequential(*layers)
+        
+        # Contiguous slices of self.network (sharing its modules) for
+        # checkpointing. Split by hand because torch.compile cannot trace
+        # checkpoint_sequential under fullgraph=True
+        segment_size = -(-len(self.network) // max(checkpoint_segments, 1))
+        self.segments = tuple(
+            self.network[i:i+segment_size] for i in range(0, len(self.network), segment_size)
+        )
     
     def forward(self, x):
+        # While training, keep only segment boundaries and recompute the rest in
+        # backward (dropout masks are replayed from the saved RNG state)
+        if self.training and self.checkpoint_segments and torch.is_grad_enabled():
+            for segment in self.segments:
+                x = torch.utils.checkpoint.checkpoint(segment, x, use_reentrant=False)
+            return x
         return self.network(x)
 
 # Initialize network and move to GPU
 print("\n🔧 Initializing GPU neural network...")
 model = NeuralNetworkGPU(
-    input_size=100,
+    input_size=input_size,
     hidden_sizes=[256, 128, 64],  # Same architecture as CPU version
     output_size=10
 ).to(device)
@@ -85,9 +113,31 @@ model = NeuralNetworkGPU(
 total_params = sum(p.numel() for p in model.parameters())
 print(f"Total parameters: {total_params:,}")
 
+# Compile the model so Linear -> ReLU -> Dropout chains fuse into fewer kernels.
+# CUDA only: on CPU the one-off compile costs more than this whole run saves.
+# Evaluation is a single pass, so it keeps the eager module rather than
+# paying for another max-autotune compile at the test-set shape
+eager_model = model
+if device.type == 'cuda' and hasattr(torch, 'compile'):
+    model = torch.compile(model, mode="max-autotune", fullgraph=True)
+
 # Define loss and optimizer (GPU optimized)
 criterion = nn.CrossEntropyLoss()
 optimizer = optim.Adam(model.parameters(), lr=0.001)
+grad_scaler = torch.amp.GradScaler(device.type, enabled=use_amp)
+
+# Compile and autotune with one untimed forward/backward at the training batch
+# shape. The optimizer does not step, so the weights are left untouched
+if model is not eager_model:
+    print("\n⚙️  Compiling model...")
+    compile_start = time.time()
+    model.train()
+    with torch.autocast(device_type=device.type, dtype=torch.float16, enabled=use_amp):
+        warmup_loss = criterion(model(X_train_tensor[:batch_size]), y_train_tensor[:batch_size])
+    grad_scaler.scale(warmup_loss).backward()
+    optimizer.zero_grad(set_to_none=True)
+    torch.cuda.synchronize()
+    print(f"Compile time: {time.time() - compile_start:.2f} seconds")
 
 # Training loop with GPU acceleration
 print("\n🚀 Starting GPU training...")
@@ -106,15 +156,25 @@ for epoch in range(epochs):
     epoch_loss = 0
     num_batches = 0
     
-    for batch_X, batch_y in train_loader:
-        # Forward pass (GPU accelerated)
-        optimizer.zero_grad()
-        outputs = model(batch_X)
-        loss = criterion(outputs, batch_y)
+    # Shuffle on the device, then gather each batch by index. The short tail
+    # batch is dropped so every step reuses the one compiled batch shape
+    permutation = torch.randperm(len(X_train_tensor), device=device)
+    
+    for i in range(0, len(X_train_tensor) - batch_size + 1, batch_size):
+        batch_indices = permutation[i:i+batch_size]
+        batch_X = X_train_tensor[batch_indices]
+        batch_y = y_train_tensor[batch_indices]
+        
+        # Forward pass (GPU accelerated, FP16 on tensor cores under autocast)
+        optimizer.zero_grad(set_to_none=True)
+        with torch.autocast(device_type=device.type, dtype=torch.float16, enabled=use_amp):
+            outputs = model(batch_X)
+            loss = criterion(outputs, batch_y)
         
-        # Backward pass (GPU accelerated)
-        loss.backward()
-        optimizer.step()
+        # Backward pass (GPU accelerated), scaled so FP16 gradients do not underflow
+        grad_scaler.scale(loss).backward()
+        grad_scaler.step(optimizer)
+        grad_scaler.update()
         
         epoch_loss += loss.item()
         num_batches += 1
@@ -131,9 +191,9 @@ total_time = time.time() - start_time
 
 # Evaluation on GPU
 print("\n📊 Evaluating model...")
-model.eval()
+eager_model.eval()
 with torch.no_grad():
-    test_outputs = model(X_test_tensor)
+    test_outputs = eager_model(X_test_tensor)
     _, predictions = torch.max(test_outputs, 1)
     accuracy = (predictions == y_test_tensor).float().mean().item()
 
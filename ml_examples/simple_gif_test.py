@@ -11,74 +11,75 @@ from PIL import Image
 
 print("🎨 Creating test GIF animation...")
 
-# Create test frames with simple animation
-frames = []
+# Create test frames with simple animation, all in one (frames, H, W, 3) array
 resolution = (200, 150)
 num_frames = 8
+frame_data = np.zeros((num_frames, resolution[1], resolution[0], 3), dtype=np.uint8)
+
+# Moving colorful rectangle
+progress = np.arange(num_frames) / num_frames
+x_pos = (progress * (resolution[0] - 40)).astype(int)
+y_pos = 50
+
+# Rainbow colors
+colors = np.stack([
+    (255 * progress).astype(int),
+    (255 * (1 - progress)).astype(int),
+    np.full(num_frames, 128)
+], axis=1)
 
 for i in range(num_frames):
-    # Create animated pattern
-    frame_data = np.zeros((resolution[1], resolution[0], 3), dtype=np.uint8)
-    
-    # Moving colorful rectangle
-    x_pos = int((i / num_frames) * (resolution[0] - 40))
-    y_pos = 50
-    
-    # Rainbow colors
-    r = int(255 * (i / num_frames))
-    g = int(255 * (1 - i / num_frames))
-    b = 128
-    
-    frame_data[y_pos:y_pos+30, x_pos:x_pos+40] = [r, g, b]
-    
-    # Add some background pattern
-    frame_data[::5, ::5] = [50, 50, 100]  # Grid pattern
-    
-    pil_image = Image.fromarray(frame_data)
-    frames.append(pil_image)
+    frame_data[i, y_pos:y_pos+30, x_pos[i]:x_pos[i]+40] = colors[i]
+
+# Add some background pattern
+frame_data[:, ::5, ::5] = [50, 50, 100]  # Grid pattern
+
+# Quantize up front against one palette shared by every frame (the animation
+# has only a handful of colours), so saving skips PIL's per-frame optimizer.
+# frombuffer wraps each frame's memory instead of copying it
+palette_image = Image.fromarray(frame_data.reshape(-1, resolution[0], 3)).quantize(colors=32)
+frames = [
+    Image.frombuffer('RGB', resolution, frame, 'raw', 'RGB', 0, 1)
+    .quantize(palette=palette_image, dither=Image.Dither.NONE)
+    for frame in frame_data
+]
 
 print(f"Generated {len(frames)} test frames")
 
-# Save GIF to file
+# Encode the GIF straight into memory; the filename is only a name for the UI
 import time
-import os
 timestamp = int(time.time() * 1000)
 gif_filename = f"simple_test_gif_{timestamp}.gif"
 
+gif_buffer = io.BytesIO()
 frames[0].save(
-    gif_filename,
+    gif_buffer,
     format='GIF',
     save_all=True,
     append_images=frames[1:],
     duration=150,  # 150ms per frame
     loop=0,
-    optimize=True
+    optimize=False
 )
 
-# Get file size
-gif_file_size = os.path.getsize(gif_filename)
-
-# --- NEW: Read GIF as base64 and bytestream for testing ---
-with open(gif_filename, 'rb') as f:
-    gif_bytes = f.read()
-
+# --- Base64 is the transport; the raw bytes are not expanded into a list of ints ---
+gif_bytes = gif_buffer.getvalue()
+gif_file_size = len(gif_bytes)
 gif_base64 = base64.b64encode(gif_bytes).decode('utf-8')
-gif_bytestream = list(gif_bytes)
 
 print(f"🔧 GIF Test Data:")
 print(f"  File size: {gif_file_size} bytes")
 print(f"  Base64 length: {len(gif_base64)} chars")
-print(f"  Bytestream length: {len(gif_bytestream)} ints")
-print(f"  First 10 bytes: {gif_bytestream[:10]}")
+print(f"  Bytestream length: {gif_file_size} bytes")
+print(f"  First 10 bytes: {list(gif_bytes[:10])}")
 print(f"  GIF header (first 6 bytes): {gif_bytes[:6]}")
 
 # Create output structure matching our backend expectations
 gif_output = {
     'type': 'gif_animation',
-    'gif_file': gif_filename,
-    'gif_filename': gif_filename,
+    'gif_filename': gif_filename,  # Download name only; no file is written
     'gif_data': gif_base64,  # Include base64 for testing
-    'gif_bytestream': gif_bytestream,  # Include bytestream for testing
+    'gif_bytestream_len': gif_file_size,  # The UI decodes gif_data when no bytestream is sent
     'fps': 6,  # ~150ms per frame = 6.67 FPS
     'resolution': list(resolution),
     'frame_count': len(frames),
@@ -89,5 +90,5 @@ gif_output = {
 print(f"GIF_OUTPUT:{json.dumps(gif_output)}")
 print(f"✅ Test GIF created successfully!")
 print(f"📊 {len(frames)} frames, {gif_file_size} bytes")
-print(f"📁 GIF saved as: {gif_filename}")
+print(f"📁 GIF encoded in memory as: {gif_filename}")
 print("🎞️ This should display as an animated GIF in the UI!")
@@ -1,63 +1,129 @@
 """
 Test script to verify the benchmark functionality without requiring warp
 """
+import atexit
 import time
 import platform
 import psutil
 import subprocess
 import sys
 import json
+import numpy as np
+
+# Rows of BenchmarkTracker.times
+FRAME, FIELD_GENERATION, MARCHING_CUBES, RENDERING = range(4)
 
 class BenchmarkTracker:
-    def __init__(self):
-        self.frame_times = []
-        self.field_generation_times = []
-        self.marching_cubes_times = []
-        self.rendering_times = []
+    # Fixed attribute set: slot stores skip the instance __dict__
+    __slots__ = ('times', 'counts', 'sums', 'total_start_time', 'frame_start_time', '_pc')
+    
+    def __init__(self, capacity=1024):
+        # One preallocated float64 row per metric plus running sums, so logging
+        # is a store and an add and averages need no pass over the history
+        self.times = np.empty((4, capacity))
+        self.counts = [0, 0, 0, 0]
+        self.sums = [0.0, 0.0, 0.0, 0.0]
         self.total_start_time = None
         self.frame_start_time = None
+        self._pc = time.perf_counter
+        
+    def _log(self, metric, duration):
+        n = self.counts[metric]
+        if n == self.times.shape[1]:
+            # Longer run than expected: double every row
+            self.times = np.concatenate([self.times, np.empty_like(self.times)], axis=1)
+        self.times[metric, n] = duration
+        self.counts[metric] = n + 1
+        self.sums[metric] += duration
+        
+    @property
+    def frame_times(self):
+        return self.times[FRAME, :self.counts[FRAME]]
+        
+    @property
+    def field_generation_times(self):
+        return self.times[FIELD_GENERATION, :self.counts[FIELD_GENERATION]]
+        
+    @property
+    def marching_cubes_times(self):
+        return self.times[MARCHING_CUBES, :self.counts[MARCHING_CUBES]]
+        
+    @property
+    def rendering_times(self):
+        return self.times[RENDERING, :self.counts[RENDERING]]
         
     def start_total_timer(self):
-        self.total_start_time = time.perf_counter()
+        self.total_start_time = self._pc()
         
     def start_frame_timer(self):
-        self.frame_start_time = time.perf_counter()
+        self.frame_start_time = self._pc()
         
     def log_field_generation(self, duration):
-        self.field_generation_times.append(duration)
+        self._log(FIELD_GENERATION, duration)
         
     def log_marching_cubes(self, duration):
-        self.marching_cubes_times.append(duration)
+        self._log(MARCHING_CUBES, duration)
         
     def log_rendering(self, duration):
-        self.rendering_times.append(duration)
+        self._log(RENDERING, duration)
         
     def end_frame_timer(self):
         if self.frame_start_time:
-            frame_duration = time.perf_counter() - self.frame_start_time
-            self.frame_times.append(frame_duration)
+            frame_duration = self._pc() - self.frame_start_time
+            self._log(FRAME, frame_duration)
             return frame_duration
         return 0
         
     def get_total_time(self):
         if self.total_start_time:
-            return time.perf_counter() - self.total_start_time
+            return self._pc() - self.total_start_time
         return 0
         
+    def average(self, metric):
+        count = self.counts[metric]
+        return self.sums[metric] / count if count else 0
+        
     def get_averages(self):
         return {
-            'avg_frame_time': sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0,
-            'avg_field_generation': sum(self.field_generation_times) / len(self.field_generation_times) if self.field_generation_times else 0,
-            'avg_marching_cubes': sum(self.marching_cubes_times) / len(self.marching_cubes_times) if self.marching_cubes_times else 0,
-            'avg_rendering': sum(self.rendering_times) / len(self.rendering_times) if self.rendering_times else 0,
+            'avg_frame_time': self.average(FRAME),
+            'avg_field_generation': self.average(FIELD_GENERATION),
+            'avg_marching_cubes': self.average(MARCHING_CUBES),
+            'avg_rendering': self.average(RENDERING),
             'total_time': self.get_total_time(),
-            'frame_count': len(self.frame_times)
+            'frame_count': self.counts[FRAME]
         }
 
+# In-process NVML handle for GPU 0, opened once at import; None means fall
+# back to nvidia-smi
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    atexit.register(pynvml.nvmlShutdown)
+    NVML_HANDLE = pynvml.nvmlDeviceGetHandleByIndex(0)
+except Exception:
+    NVML_HANDLE = None
+
+def get_nvml_gpu_info():
+    """Get GPU information through NVML without spawning nvidia-smi"""
+    name = pynvml.nvmlDeviceGetName(NVML_HANDLE)
+    memory = pynvml.nvmlDeviceGetMemoryInfo(NVML_HANDLE)
+    return {
+        "name": name.decode() if isinstance(name, bytes) else name,
+        "memory_total": memory.total >> 20,  # MiB, as nvidia-smi reports it
+        "memory_used": memory.used >> 20,
+        "utilization": pynvml.nvmlDeviceGetUtilizationRates(NVML_HANDLE).gpu
+    }
+
 def get_gpu_info():
     """Get GPU information if available"""
     gpu_info = {"name": "Unknown", "memory_total": 0, "memory_used": 0, "utilization": 0}
     
+    if NVML_HANDLE is not None:
+        try:
+            return get_nvml_gpu_info()
+        except pynvml.NVMLError:
+            pass
+    
     try:
         # Try nvidia-smi for NVIDIA GPUs
         result = subprocess.run(['nvidia-smi', '--query-gpu=name,memory.total,memory.used,utilization.gpu', '--format=csv,noheader,nounits'], 
@@ -78,10 +144,14 @@ def get_gpu_info():
     
     return gpu_info
 
+# Prime psutil's CPU counters so get_system_info can read utilization since
+# import without sleeping through a sampling interval
+psutil.cpu_percent(interval=None)
+
 def get_system_info():
     """Get comprehensive system information"""
     try:
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         gpu_info = get_gpu_info()
         
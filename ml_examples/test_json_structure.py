@@ -1,22 +1,62 @@
 # Test script to verify benchmark JSON output structure
-import json
+import orjson
 import numpy as np
 
-def make_json_safe(obj):
-    """Ensure all values in object are JSON serializable"""
+def _identity(obj):
+    return obj
+
+def _walk_dict(obj):
+    return {k: make_json_safe(v) for k, v in obj.items()}
+
+def _walk_list(obj):
+    return [make_json_safe(item) for item in obj]
+
+def _to_list(obj):
+    return obj.tolist()  # whole array in C, no per-element recursion
+
+# Exact type -> converter: one dict lookup per node instead of an isinstance
+# chain that walks numpy's scalar hierarchy
+_HANDLERS = {
+    dict: _walk_dict,
+    list: _walk_list,
+    tuple: _walk_list,
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    np.ndarray: _to_list,
+}
+_HANDLERS.update((t, float) for t in set(np.sctypeDict.values())
+                 if issubclass(t, (np.integer, np.floating)))
+
+def _make_json_safe_slow(obj):
+    """isinstance fallback for subclasses and anything else not in _HANDLERS"""
     if isinstance(obj, (list, tuple)):
-        return [make_json_safe(item) for item in obj]
+        return _walk_list(obj)
     elif isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
+        return _walk_dict(obj)
     elif isinstance(obj, (np.integer, np.floating)):
         return float(obj)
     elif isinstance(obj, np.ndarray):
         return obj.tolist()
-    elif obj is None or isinstance(obj, (int, float, str, bool)):
+    elif isinstance(obj, (int, float, str, bool)):
         return obj
     else:
         return str(obj)
 
+def make_json_safe(obj):
+    """Ensure all values in object are JSON serializable (fallback for dumps_json_safe)"""
+    handler = _HANDLERS.get(type(obj))
+    return handler(obj) if handler else _make_json_safe_slow(obj)
+
+def dumps_json_safe(obj):
+    """Serialize to JSON bytes; orjson handles numpy natively, so the walker only runs on types it rejects"""
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    except TypeError:
+        return orjson.dumps(make_json_safe(obj))
+
 # Test data structure that will be sent to frontend
 test_benchmark_data = {
     'type': 'gif_animation',
@@ -85,13 +125,12 @@ test_benchmark_data = {
 
 # Test JSON serialization
 try:
-    json_safe_data = make_json_safe(test_benchmark_data)
-    json_string = json.dumps(json_safe_data)
+    json_bytes = dumps_json_safe(test_benchmark_data)
     print("✅ JSON serialization test PASSED")
-    print(f"JSON output size: {len(json_string)} characters")
+    print(f"JSON output size: {len(json_bytes)} bytes")
     
     # Test parsing back
-    parsed_data = json.loads(json_string)
+    parsed_data = orjson.loads(json_bytes)
     print("✅ JSON parsing test PASSED")
     
     # Verify key benchmark fields exist
@@ -1,14 +1,14 @@
 import warp as wp
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.animation as animation
-import matplotlib.pyplot as plt
 import pyglet
 import warp.render
 import json
 import base64
 import io
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 
 # Warp config
 wp.config.quiet = True
@@ -42,8 +42,7 @@ def sdf_translate(pos: wp.vec3, offset: wp.vec3):
 
 
 @wp.func
-def sdf_rotate(pos: wp.vec3, angles: wp.vec3):
-    rot = wp.quat_rpy(wp.radians(angles[0]), wp.radians(angles[1]), wp.radians(angles[2]))
+def sdf_rotate(pos: wp.vec3, rot: wp.quat):
     return wp.quat_rotate_inv(rot, pos)
 
 
@@ -53,35 +52,106 @@ def sdf_smooth_min(a: float, b: float, radius: float):
     return wp.min(a, b) - h * h * h * radius * (1.0 / 6.0)
 
 
+@wp.func
+def scene_sdf(
+    pos: wp.vec3,
+    torus_altitude: float,
+    torus_major_radius: float,
+    torus_minor_radius: float,
+    smooth_min_radius: float,
+    torus_rotation: wp.quat,
+):
+    box = sdf_create_box(sdf_translate(pos, wp.vec3(0.0, -0.7, 0.0)), wp.vec3(0.9, 0.3, 0.9))
+    torus = sdf_create_torus(
+        sdf_rotate(
+            sdf_translate(pos, wp.vec3(0.0, torus_altitude, 0.0)),
+            torus_rotation,
+        ),
+        torus_major_radius,
+        torus_minor_radius,
+    )
+
+    return sdf_smooth_min(box, torus, smooth_min_radius)
+
+
+# Voxels per side of a coarse block
+FIELD_BLOCK = wp.constant(4)
+
+
+@wp.kernel(enable_backward=False)
+def make_field_coarse(
+    torus_altitude: float,
+    torus_major_radius: float,
+    torus_minor_radius: float,
+    smooth_min_radius: float,
+    block_size: float,
+    block_offset: float,
+    torus_rotation: wp.quat,
+    out_data: wp.array3d(dtype=float),
+):
+    i, j, k = wp.tid()
+
+    # SDF at the centre of block (i, j, k)
+    pos = wp.vec3(
+        block_size * float(i) + block_offset,
+        block_size * float(j) + block_offset,
+        block_size * float(k) + block_offset,
+    )
+
+    out_data[i, j, k] = scene_sdf(
+        pos, torus_altitude, torus_major_radius, torus_minor_radius, smooth_min_radius, torus_rotation
+    )
+
+
 @wp.kernel(enable_backward=False)
 def make_field(
     torus_altitude: float,
     torus_major_radius: float,
     torus_minor_radius: float,
     smooth_min_radius: float,
-    dim: int,
-    time: float,
+    voxel_size: float,
+    voxel_offset: float,
+    torus_rotation: wp.quat,
+    coarse: wp.array3d(dtype=float),
+    active_radius: float,
     out_data: wp.array3d(dtype=float),
 ):
     i, j, k = wp.tid()
 
+    # The scene SDF is 1-Lipschitz (box and torus are exact, the polynomial
+    # smooth min blends their gradients convexly), so a block whose centre is
+    # further than active_radius from the surface has one sign across all its
+    # voxels and their neighbours. No marching-cubes cell can straddle zero
+    # there, so the centre value stands in for the real one
+    block_value = coarse[i // FIELD_BLOCK, j // FIELD_BLOCK, k // FIELD_BLOCK]
+    if wp.abs(block_value) > active_radius:
+        out_data[i, j, k] = block_value
+        return
+
+    # Voxel centre in [-1, 1]: one multiply-add per axis, no division
     pos = wp.vec3(
-        2.0 * ((float(i) + 0.5) / float(dim)) - 1.0,
-        2.0 * ((float(j) + 0.5) / float(dim)) - 1.0,
-        2.0 * ((float(k) + 0.5) / float(dim)) - 1.0,
+        voxel_size * float(i) + voxel_offset,
+        voxel_size * float(j) + voxel_offset,
+        voxel_size * float(k) + voxel_offset,
     )
 
-    box = sdf_create_box(sdf_translate(pos, wp.vec3(0.0, -0.7, 0.0)), wp.vec3(0.9, 0.3, 0.9))
-    torus = sdf_create_torus(
-        sdf_rotate(
-            sdf_translate(pos, wp.vec3(0.0, torus_altitude, 0.0)),
-            wp.vec3(wp.sin(time) * 90.0, wp.cos(time) * 45.0, 0.0),
-        ),
-        torus_major_radius,
-        torus_minor_radius,
+    out_data[i, j, k] = scene_sdf(
+        pos, torus_altitude, torus_major_radius, torus_minor_radius, smooth_min_radius, torus_rotation
     )
 
-    out_data[i, j, k] = sdf_smooth_min(box, torus, smooth_min_radius)
+@wp.kernel(enable_backward=False)
+def pixels_to_uint8(src: wp.array3d(dtype=float), dst: wp.array3d(dtype=wp.uint8)):
+    i, j, c = wp.tid()
+    # Same truncating scale as (frame * 255).astype(np.uint8), saturated
+    dst[i, j, c] = wp.uint8(wp.clamp(src[i, j, c] * 255.0, 0.0, 255.0))
+
+def torus_rotation_at(time):
+    """Torus orientation at `time`: wp.quat_rpy(radians(sin(t) * 90), radians(cos(t) * 45), 0) on the host"""
+    roll = math.radians(math.sin(time) * 90.0) * 0.5
+    pitch = math.radians(math.cos(time) * 45.0) * 0.5
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    return wp.quat(sr * cp, cr * sp, -sr * sp, cr * cp)
 
 # ---------- Simulation Settings ----------
 
@@ -90,6 +160,17 @@ num_frames = 30  # Reduced for faster execution
 fps = 30
 
 dim = 32  # Reduced for faster execution
+# make_field maps voxel i to 2 * (i + 0.5) / dim - 1 as i * voxel_size + voxel_offset
+voxel_size = 2.0 / dim
+voxel_offset = 1.0 / dim - 1.0
+# Coarse blocks of FIELD_BLOCK^3 voxels; block b is centred on voxel
+# FIELD_BLOCK * b + (FIELD_BLOCK - 1) / 2. Cells reach one voxel past the
+# block, so the furthest corner they touch is (FIELD_BLOCK + 1) / 2 voxels
+# away along each axis
+coarse_dim = (dim + FIELD_BLOCK - 1) // FIELD_BLOCK
+block_size = FIELD_BLOCK * voxel_size
+block_offset = voxel_offset + 0.5 * (FIELD_BLOCK - 1) * voxel_size
+active_radius = math.sqrt(3.0) * 0.5 * (FIELD_BLOCK + 1) * voxel_size
 max_verts = int(1e6)
 max_tris = int(1e6)
 
@@ -98,9 +179,14 @@ torus_major_radius = 0.5
 torus_minor_radius = 0.1
 smooth_min_radius = 0.5
 
-field = wp.zeros((dim, dim, dim), dtype=float)
+# Two fields so the next frame's SDF can be generated while this one is meshed
+fields = [wp.zeros((dim, dim, dim), dtype=float) for _ in range(2)]
+# Only read by the same frame's make_field on the same stream, so one suffices
+coarse_field = wp.zeros((coarse_dim, coarse_dim, coarse_dim), dtype=float)
 mc = wp.MarchingCubes(dim, dim, dim, max_verts, max_tris)
 
+surface_color = np.array((0.35, 0.55, 0.9), dtype=np.float32)
+
 camera_pos = (16.0, 16.0, 75.0)  # Adjusted for smaller dim
 camera_front = (0.0, -0.2, -1.0)
 
@@ -117,59 +203,159 @@ renderer = wp.render.OpenGLRenderer(
     headless=True,  # Enable headless mode for server
 )
 
-image = wp.empty(shape=(resolution[1], resolution[0], 3), dtype=float)
+images = [wp.empty(shape=(resolution[1], resolution[0], 3), dtype=float) for _ in range(2)]
+# Frames are narrowed to uint8 on the device so readback moves a quarter of
+# the bytes; only the I/O stream touches it, so one buffer suffices
+image_uint8 = wp.empty(shape=(resolution[1], resolution[0], 3), dtype=wp.uint8)
+
+# Field generation runs on its own stream and readback on another, so they
+# overlap with marching cubes and drawing on the default stream; events order
+# each buffer's producer before its consumer
+render_stream = wp.get_stream()
+stream_compute = wp.Stream(render_stream.device)
+stream_io = wp.Stream(render_stream.device)
+
+
+def launch_field(frame):
+    """Queue frame's SDF into its field buffer; returns the event marking it ready"""
+    torus_rotation = torus_rotation_at(frame / fps)
+    with wp.ScopedStream(stream_compute):
+        # Coarse pass first, so the full-resolution pass only evaluates the
+        # SDF in blocks near the surface
+        wp.launch(
+            make_field_coarse,
+            dim=coarse_field.shape,
+            inputs=(
+                torus_altitude,
+                torus_major_radius,
+                torus_minor_radius,
+                smooth_min_radius,
+                block_size,
+                block_offset,
+                torus_rotation,
+            ),
+            outputs=(coarse_field,),
+        )
+        wp.launch(
+            make_field,
+            dim=fields[frame & 1].shape,
+            inputs=(
+                torus_altitude,
+                torus_major_radius,
+                torus_minor_radius,
+                smooth_min_radius,
+                voxel_size,
+                voxel_offset,
+                torus_rotation,
+                coarse_field,
+                active_radius,
+            ),
+            outputs=(fields[frame & 1],),
+        )
+    return stream_compute.record_event()
+
+# Frames are read back into a small ring of pinned host buffers allocated once.
+# A slot's frame is copied out before the frame PINNED_RING later overwrites
+# it, so nothing is allocated pinned per frame
+PINNED_RING = 4
+pinned_pool = [
+    wp.empty(shape=image_uint8.shape, dtype=wp.uint8, device="cpu", pinned=True)
+    for _ in range(PINNED_RING)
+]
+pinned_ready = [None] * PINNED_RING
+frames_uint8 = []
+
+
+def collect_frame(slot):
+    """Wait for the copy into a ring slot to land, then keep a copy of that frame"""
+    wp.synchronize_event(pinned_ready[slot])
+    pinned_ready[slot] = None
+    frames_uint8.append(pinned_pool[slot].numpy().copy())
 
 # ---------- Frame Rendering Loop ----------
 
-renders = []
 print("Starting WARP volume simulation...")
 
+field_ready = launch_field(0)
+surface_done = None
+
 for frame in range(num_frames):
     print(f"Rendering frame {frame + 1}/{num_frames}")
     
-    wp.launch(
-        make_field,
-        dim=field.shape,
-        inputs=(
-            torus_altitude,
-            torus_major_radius,
-            torus_minor_radius,
-            smooth_min_radius,
-            dim,
-            frame / fps,
-        ),
-        outputs=(field,),
-    )
-
-    mc.surface(field, 0.0)
-
+    # Start the next field first; its buffer was last read by the previous
+    # frame's marching cubes
+    if frame + 1 < num_frames:
+        if surface_done is not None:
+            stream_compute.wait_event(surface_done)
+        next_field_ready = launch_field(frame + 1)
+
+    render_stream.wait_event(field_ready)
+    mc.surface(fields[frame & 1], 0.0)
+    surface_done = render_stream.record_event()
+
+    # One host copy per output; the colour is a stride-0 view of a single RGB
+    # row rather than a Python tuple per vertex
+    verts = mc.verts.numpy()
     renderer.begin_frame(frame / num_frames)
     renderer.render_mesh(
         "surface",
-        mc.verts.numpy(),
+        verts,
         mc.indices.numpy(),
-        colors=((0.35, 0.55, 0.9),) * len(mc.verts),
+        colors=np.broadcast_to(surface_color, verts.shape),
         update_topology=True,
     )
     renderer.end_frame()
 
-    renderer.get_pixels(image, split_up_tiles=False, mode="rgb")
-    renders.append(wp.clone(image, device="cpu", pinned=True))
+    # Copy out on the I/O stream; the host keeps going with the next frame
+    # and only waits when it needs this ring slot again
+    slot = frame % PINNED_RING
+    if pinned_ready[slot] is not None:
+        collect_frame(slot)
+    image = images[frame & 1]
+    with wp.ScopedStream(stream_io):
+        stream_io.wait_stream(render_stream)
+        renderer.get_pixels(image, split_up_tiles=False, mode="rgb")
+        wp.launch(pixels_to_uint8, dim=image.shape, inputs=(image,), outputs=(image_uint8,))
+        wp.copy(pinned_pool[slot], image_uint8)
+        pinned_ready[slot] = stream_io.record_event()
+
+    if frame + 1 < num_frames:
+        field_ready = next_field_ready
+
+# Collect the frames still in the ring, oldest first
+for frame in range(max(num_frames - PINNED_RING, 0), num_frames):
+    collect_frame(frame % PINNED_RING)
 
 # ---------- Convert frames to GIF for frontend ----------
 
-def frame_to_pil_image(frame_array):
-    """Convert numpy frame to PIL Image"""
+def frame_to_uint8(frame_array):
+    """Scale a float [0, 1] frame to uint8 (uint8 frames pass through)"""
+    if frame_array.dtype != np.uint8:
+        return (frame_array * 255).astype(np.uint8)
+    return frame_array
+
+def shared_palette(frames_uint8, samples=8):
+    """Build one 256-colour palette from a montage of evenly spaced frames"""
     try:
-        # Convert to uint8
-        if frame_array.dtype != np.uint8:
-            frame_uint8 = (frame_array * 255).astype(np.uint8)
-        else:
-            frame_uint8 = frame_array
+        from PIL import Image
+    except ImportError:
+        print("PIL not available, cannot create GIF")
+        return None
+    step = max(1, len(frames_uint8) // samples)
+    montage = np.concatenate(frames_uint8[::step], axis=0)
+    return Image.fromarray(montage).quantize(colors=256)
+
+def frame_to_pil_image(frame_array, palette=None):
+    """Convert numpy frame to PIL Image, mapped onto `palette` when given"""
+    try:
+        frame_uint8 = frame_to_uint8(frame_array)
         
         try:
             from PIL import Image
-            return Image.fromarray(frame_uint8)
+            image = Image.fromarray(frame_uint8)
+            if palette is not None:
+                image = image.quantize(palette=palette, dither=Image.Dither.NONE)
+            return image
         except ImportError:
             print("PIL not available, cannot create GIF")
             return None
@@ -178,14 +364,22 @@ def frame_to_pil_image(frame_array):
         return None
 
 print("Converting frames to GIF animation...")
+
+# Every frame maps onto one palette (median cut runs once, not once per
+# frame inside save), so the GIF can be written without the optimize pass
+palette_image = shared_palette(frames_uint8) if frames_uint8 else None
+
+# Palette mapping runs in PIL's C code with the GIL released, so frames are
+# converted on worker threads; only the GIF encode below stays serial
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+    converted = list(pool.map(frame_to_pil_image, frames_uint8, repeat(palette_image)))
+
 gif_frames = []
-for i, render in enumerate(renders):
-    frame_data = render.numpy()
-    pil_image = frame_to_pil_image(frame_data)
+for i, pil_image in enumerate(converted):
     if pil_image:
         gif_frames.append(pil_image)
         if (i + 1) % 5 == 0:  # Progress indicator
-            print(f"  Converted frame {i + 1}/{len(renders)}")
+            print(f"  Converted frame {i + 1}/{len(frames_uint8)}")
 
 # Create GIF in memory
 if gif_frames:
@@ -198,7 +392,7 @@ if gif_frames:
         append_images=gif_frames[1:],
         duration=int(1000/fps),  # Duration per frame in milliseconds
         loop=0,  # Infinite loop
-        optimize=True
+        optimize=False
     )
     
     # Convert to base64
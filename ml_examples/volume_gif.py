@@ -8,7 +8,9 @@ import warp.render
 import json
 import base64
 import io
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
 # Warp config
@@ -43,8 +45,7 @@ def sdf_translate(pos: wp.vec3, offset: wp.vec3):
 
 
 @wp.func
-def sdf_rotate(pos: wp.vec3, angles: wp.vec3):
-    rot = wp.quat_rpy(wp.radians(angles[0]), wp.radians(angles[1]), wp.radians(angles[2]))
+def sdf_rotate(pos: wp.vec3, rot: wp.quat):
     return wp.quat_rotate_inv(rot, pos)
 
 
@@ -54,6 +55,57 @@ def sdf_smooth_min(a: float, b: float, radius: float):
     return wp.min(a, b) - h * h * h * radius * (1.0 / 6.0)
 
 
+@wp.func
+def scene_sdf(
+    pos: wp.vec3,
+    torus_altitude: float,
+    torus_major_radius: float,
+    torus_minor_radius: float,
+    smooth_min_radius: float,
+    torus_rotation: wp.quat,
+):
+    box = sdf_create_box(sdf_translate(pos, wp.vec3(0.0, -0.7, 0.0)), wp.vec3(0.9, 0.3, 0.9))
+    torus = sdf_create_torus(
+        sdf_rotate(
+            sdf_translate(pos, wp.vec3(0.0, torus_altitude, 0.0)),
+            torus_rotation,
+        ),
+        torus_major_radius,
+        torus_minor_radius,
+    )
+
+    return sdf_smooth_min(box, torus, smooth_min_radius)
+
+
+# Voxels per side of a coarse block
+FIELD_BLOCK = wp.constant(4)
+
+
+@wp.kernel(enable_backward=False)
+def make_field_coarse(
+    torus_altitude: float,
+    torus_major_radius: float,
+    torus_minor_radius: float,
+    smooth_min_radius: float,
+    dim: int,
+    torus_rotations: wp.array(dtype=wp.quat),
+    out_data: wp.array4d(dtype=float),
+):
+    frame, i, j, k = wp.tid()
+
+    # SDF at the centre of block (i, j, k), i.e. voxel FIELD_BLOCK * i + (FIELD_BLOCK - 1) / 2
+    half_block = 0.5 * float(FIELD_BLOCK)
+    pos = wp.vec3(
+        2.0 * ((float(i * FIELD_BLOCK) + half_block) / float(dim)) - 1.0,
+        2.0 * ((float(j * FIELD_BLOCK) + half_block) / float(dim)) - 1.0,
+        2.0 * ((float(k * FIELD_BLOCK) + half_block) / float(dim)) - 1.0,
+    )
+
+    out_data[frame, i, j, k] = scene_sdf(
+        pos, torus_altitude, torus_major_radius, torus_minor_radius, smooth_min_radius, torus_rotations[frame]
+    )
+
+
 @wp.kernel(enable_backward=False)
 def make_field(
     torus_altitude: float,
@@ -61,10 +113,21 @@ def make_field(
     torus_minor_radius: float,
     smooth_min_radius: float,
     dim: int,
-    time: float,
-    out_data: wp.array3d(dtype=float),
+    torus_rotations: wp.array(dtype=wp.quat),
+    coarse: wp.array4d(dtype=float),
+    active_radius: float,
+    out_data: wp.array4d(dtype=float),
 ):
-    i, j, k = wp.tid()
+    frame, i, j, k = wp.tid()
+
+    # The scene SDF is 1-Lipschitz, so a block whose centre is further than
+    # active_radius from the surface has one sign across all its voxels and
+    # their neighbours; no marching-cubes cell straddles zero there, and the
+    # centre value stands in for the real one
+    block_value = coarse[frame, i // FIELD_BLOCK, j // FIELD_BLOCK, k // FIELD_BLOCK]
+    if wp.abs(block_value) > active_radius:
+        out_data[frame, i, j, k] = block_value
+        return
 
     pos = wp.vec3(
         2.0 * ((float(i) + 0.5) / float(dim)) - 1.0,
@@ -72,17 +135,23 @@ def make_field(
         2.0 * ((float(k) + 0.5) / float(dim)) - 1.0,
     )
 
-    box = sdf_create_box(sdf_translate(pos, wp.vec3(0.0, -0.7, 0.0)), wp.vec3(0.9, 0.3, 0.9))
-    torus = sdf_create_torus(
-        sdf_rotate(
-            sdf_translate(pos, wp.vec3(0.0, torus_altitude, 0.0)),
-            wp.vec3(wp.sin(time) * 90.0, wp.cos(time) * 45.0, 0.0),
-        ),
-        torus_major_radius,
-        torus_minor_radius,
+    out_data[frame, i, j, k] = scene_sdf(
+        pos, torus_altitude, torus_major_radius, torus_minor_radius, smooth_min_radius, torus_rotations[frame]
     )
 
-    out_data[i, j, k] = sdf_smooth_min(box, torus, smooth_min_radius)
+@wp.kernel(enable_backward=False)
+def pixels_to_uint8(src: wp.array3d(dtype=float), dst: wp.array3d(dtype=wp.uint8)):
+    i, j, c = wp.tid()
+    # Same truncating scale as (frame * 255).astype(np.uint8), saturated
+    dst[i, j, c] = wp.uint8(wp.clamp(src[i, j, c] * 255.0, 0.0, 255.0))
+
+def torus_rotation_at(time):
+    """Torus orientation at `time` as (x, y, z, w): wp.quat_rpy(radians(sin(t) * 90), radians(cos(t) * 45), 0)"""
+    roll = math.radians(math.sin(time) * 90.0) * 0.5
+    pitch = math.radians(math.cos(time) * 45.0) * 0.5
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    return (sr * cp, cr * sp, -sr * sp, cr * cp)
 
 # ---------- Simulation Settings ----------
 
@@ -91,6 +160,11 @@ num_frames = 20  # Fewer frames for manageable GIF size
 fps = 10  # Lower FPS for smooth GIF
 
 dim = 32
+# Coarse blocks of FIELD_BLOCK^3 voxels. Cells reach one voxel past a block,
+# so the furthest corner they touch is (FIELD_BLOCK + 1) / 2 voxels from its
+# centre along each axis
+coarse_dim = (dim + FIELD_BLOCK - 1) // FIELD_BLOCK
+active_radius = math.sqrt(3.0) * 0.5 * (FIELD_BLOCK + 1) * (2.0 / dim)
 max_verts = int(1e6)
 max_tris = int(1e6)
 
@@ -99,9 +173,18 @@ torus_major_radius = 0.5
 torus_minor_radius = 0.1
 smooth_min_radius = 0.5
 
-field = wp.zeros((dim, dim, dim), dtype=float)
+# Every frame's field is generated up front by one launch (only the torus
+# rotation changes between frames); marching cubes then walks the frames
+fields = wp.zeros((num_frames, dim, dim, dim), dtype=float)
+coarse_fields = wp.zeros((num_frames, coarse_dim, coarse_dim, coarse_dim), dtype=float)
+torus_rotations = wp.array(
+    np.array([torus_rotation_at(frame / fps) for frame in range(num_frames)], dtype=np.float32),
+    dtype=wp.quat,
+)
 mc = wp.MarchingCubes(dim, dim, dim, max_verts, max_tris)
 
+surface_color = np.array((0.35, 0.55, 0.9), dtype=np.float32)
+
 camera_pos = (16.0, 16.0, 75.0)
 camera_front = (0.0, -0.2, -1.0)
 
@@ -119,52 +202,100 @@ renderer = wp.render.OpenGLRenderer(
 )
 
 image = wp.empty(shape=(resolution[1], resolution[0], 3), dtype=float)
+# Frames are narrowed to uint8 on the device so readback moves a quarter of
+# the bytes and the host has no conversion pass left
+image_uint8 = wp.empty(shape=(resolution[1], resolution[0], 3), dtype=wp.uint8)
+
+# Frame readback runs on its own stream so it overlaps with marching cubes and
+# drawing on the default stream
+render_stream = wp.get_stream()
+stream_io = wp.Stream(render_stream.device)
+
+# Pinned staging for the mesh handed to the renderer each frame
+verts_host = wp.empty(max_verts, dtype=wp.vec3, device="cpu", pinned=True)
+indices_host = wp.empty(3 * max_tris, dtype=wp.int32, device="cpu", pinned=True)
+
+# Every frame is read back into its own slot of one pinned allocation, so
+# nothing is allocated per frame and the loop never waits on a copy
+readback_pool = wp.empty(shape=(num_frames, *image.shape), dtype=wp.uint8, device="cpu", pinned=True)
 
 # ---------- Frame Rendering Loop ----------
 
 print("Starting Simulation for GIF generation...")
-gif_frames = []
+
+# Coarse pass first, so the full-resolution pass only evaluates the SDF in
+# blocks near the surface
+wp.launch(
+    make_field_coarse,
+    dim=coarse_fields.shape,
+    inputs=(
+        torus_altitude,
+        torus_major_radius,
+        torus_minor_radius,
+        smooth_min_radius,
+        dim,
+        torus_rotations,
+    ),
+    outputs=(coarse_fields,),
+)
+wp.launch(
+    make_field,
+    dim=fields.shape,
+    inputs=(
+        torus_altitude,
+        torus_major_radius,
+        torus_minor_radius,
+        smooth_min_radius,
+        dim,
+        torus_rotations,
+        coarse_fields,
+        active_radius,
+    ),
+    outputs=(fields,),
+)
 
 for frame in range(num_frames):
     print(f"Rendering frame {frame + 1}/{num_frames}")
     
-    wp.launch(
-        make_field,
-        dim=field.shape,
-        inputs=(
-            torus_altitude,
-            torus_major_radius,
-            torus_minor_radius,
-            smooth_min_radius,
-            dim,
-            frame / fps,
-        ),
-        outputs=(field,),
-    )
-
-    mc.surface(field, 0.0)
-
+    mc.surface(fields[frame], 0.0)
+
+    # Stage the mesh through pinned memory and wait once for both copies
+    num_verts = len(mc.verts)
+    num_indices = len(mc.indices)
+    wp.copy(verts_host, mc.verts)
+    wp.copy(indices_host, mc.indices)
+    wp.synchronize_stream(render_stream)
+
+    # The colour is a stride-0 view of a single RGB row rather than a Python
+    # tuple per vertex
+    verts = verts_host.numpy()[:num_verts]
     renderer.begin_frame(frame / num_frames)
     renderer.render_mesh(
         "surface",
-        mc.verts.numpy(),
-        mc.indices.numpy(),
-        colors=((0.35, 0.55, 0.9),) * len(mc.verts),
+        verts,
+        indices_host.numpy()[:num_indices],
+        colors=np.broadcast_to(surface_color, verts.shape),
         update_topology=True,
     )
     renderer.end_frame()
 
-    renderer.get_pixels(image, split_up_tiles=False, mode="rgb")
-    
-    # Convert frame to PIL Image
-    frame_data = image.numpy()
-    if frame_data.dtype != np.uint8:
-        frame_data = (frame_data * 255).astype(np.uint8)
-    
-    pil_image = Image.fromarray(frame_data)
-    gif_frames.append(pil_image)
-
-wp.synchronize()
+    # Copy out on the I/O stream; the host keeps going with the next frame
+    with wp.ScopedStream(stream_io):
+        stream_io.wait_stream(render_stream)
+        renderer.get_pixels(image, split_up_tiles=False, mode="rgb")
+        wp.launch(pixels_to_uint8, dim=image.shape, inputs=(image,), outputs=(image_uint8,))
+        wp.copy(readback_pool[frame], image_uint8)
+
+# One wait for every queued readback, then convert the frames
+wp.synchronize_stream(stream_io)
+def frame_to_gif_palette(frame_data):
+    """Quantize one frame to its own adaptive palette, as GIF save would"""
+    return Image.fromarray(frame_data).convert("P", palette=Image.Palette.ADAPTIVE)
+
+# The median-cut quantize runs in PIL's C code with the GIL released, so it is
+# spread over worker threads here instead of running frame by frame inside save
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+    gif_frames = list(pool.map(frame_to_gif_palette, readback_pool.numpy()))
 
 # ---------- Create GIF ----------
 
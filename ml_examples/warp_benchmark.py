@@ -38,6 +38,7 @@ Usage:
     benchmark_data = benchmark.get_benchmark_data()
 """
 
+import atexit
 import time
 import platform
 import psutil
@@ -49,6 +50,20 @@ import numpy as np
 from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 
+# In-process NVML handle for GPU 0, opened once at import; None means fall
+# back to nvidia-smi
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    atexit.register(pynvml.nvmlShutdown)
+    NVML_HANDLE = pynvml.nvmlDeviceGetHandleByIndex(0)
+except Exception:
+    NVML_HANDLE = None
+
+# Prime psutil's CPU counters so the first utilization read returns the load
+# since import instead of sleeping through a sampling interval
+psutil.cpu_percent(interval=None)
+
 
 class WarpBenchmark:
     """Comprehensive benchmarking system for WARP simulations"""
@@ -190,8 +205,25 @@ class WarpBenchmark:
                 print(f"Warning: Resource monitoring error: {e}")
                 time.sleep(self.monitor_interval)
     
+    def _get_nvml_gpu_info(self) -> Dict:
+        """Get GPU name, memory (MiB) and utilization through NVML"""
+        name = pynvml.nvmlDeviceGetName(NVML_HANDLE)
+        memory = pynvml.nvmlDeviceGetMemoryInfo(NVML_HANDLE)
+        return {
+            "name": name.decode() if isinstance(name, bytes) else name,
+            "memory_total": memory.total >> 20,  # MiB, as nvidia-smi reports it
+            "memory_used": memory.used >> 20,
+            "utilization": pynvml.nvmlDeviceGetUtilizationRates(NVML_HANDLE).gpu
+        }
+    
     def _get_gpu_utilization(self) -> Optional[Dict]:
         """Get current GPU utilization"""
+        if NVML_HANDLE is not None:
+            try:
+                return self._get_nvml_gpu_info()
+            except pynvml.NVMLError:
+                pass
+        
         try:
             result = subprocess.run([
                 'nvidia-smi', 
@@ -216,7 +248,7 @@ class WarpBenchmark:
     def _get_system_info(self) -> Dict:
         """Get comprehensive system information"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             gpu_info = self._get_detailed_gpu_info()
             
@@ -250,6 +282,12 @@ class WarpBenchmark:
         """Get detailed GPU information"""
         gpu_info = {"name": "Unknown", "memory_total": 0, "memory_used": 0, "utilization": 0}
         
+        if NVML_HANDLE is not None:
+            try:
+                return self._get_nvml_gpu_info()
+            except pynvml.NVMLError:
+                pass
+        
         try:
             result = subprocess.run([
                 'nvidia-smi', 
@@ -9,7 +9,7 @@ output and benchmark data to the frontend.
 
 import sys
 import os
-import json
+import orjson
 import subprocess
 import tempfile
 import time
@@ -130,8 +130,9 @@ def main():
         script_path = sys.argv[1]
         result = execute_script_with_benchmarking(script_path)
     
-    # Output result for server to capture
-    print(f"\nWARP_EXECUTION_RESULT:{json.dumps(result)}")
+    # Output result for server to capture; benchmark_data holds dataclasses
+    # and numpy values, which orjson serializes directly
+    print(f"\nWARP_EXECUTION_RESULT:{orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()}")
     
     return result
 
@@ -4,18 +4,44 @@ Simple test script to generate VIDEO_OUTPUT without heavy dependencies
 This can be used to test the video playback functionality
 """
 
-import json
 import base64
+import os
+import sys
+import threading
+import orjson
 import numpy as np
 from PIL import Image
 import io
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # SIMD base64 that returns str directly (no separate .decode pass)
+    from pybase64 import b64encode_as_string
+except ImportError:
+    def b64encode_as_string(data):
+        return base64.b64encode(data).decode('ascii')
+
+# One reusable output buffer per encoder thread
+_thread_local = threading.local()
+
+def encode_frame_as_jpeg(img_array):
+    """JPEG bytes for one RGB frame (PIL releases the GIL while encoding)"""
+    img_buffer = getattr(_thread_local, 'buffer', None)
+    if img_buffer is None:
+        img_buffer = _thread_local.buffer = io.BytesIO()
+    img_buffer.seek(0)
+    img_buffer.truncate()
+    Image.fromarray(img_array).save(img_buffer, format='JPEG', quality=85)
+    return img_buffer.getvalue()
 
 print("Generating test video frames...")
 
-# Generate 10 simple test frames
-frames = []
+# Generate 10 simple test frames; each is JPEG-encoded on a worker thread as
+# soon as it is drawn, while the next one is being generated
+jpeg_futures = []
 fps = 10
 resolution = [320, 240]
+encoder = ThreadPoolExecutor(max_workers=os.cpu_count())
 
 for i in range(10):
     # Create a simple test image - gradient with frame number
@@ -31,22 +57,23 @@ for i in range(10):
                 ((i + 1) * 255) // 10        # Blue based on frame number
             ]
     
-    # Create PIL Image and convert to JPEG
-    img = Image.fromarray(img_array)
-    img_buffer = io.BytesIO()
-    img.save(img_buffer, format='JPEG', quality=85)
-    img_bytes = img_buffer.getvalue()
+    # Hand the frame to the encoder while it is still hot in cache
+    jpeg_futures.append(encoder.submit(encode_frame_as_jpeg, img_array))
     
-    # Encode to base64
-    encoded_frame = base64.b64encode(img_bytes).decode('utf-8')
-    
-    frames.append({
+    print(f"  Generated frame {i + 1}/10")
+
+jpeg_frames = [future.result() for future in jpeg_futures]
+encoder.shutdown()
+
+# Base64-encode every JPEG in one pass once rendering is done
+frames = [
+    {
         'frame': i,
         'timestamp': i / fps,
-        'image': encoded_frame
-    })
-    
-    print(f"  Generated frame {i + 1}/10")
+        'image': b64encode_as_string(img_bytes)
+    }
+    for i, img_bytes in enumerate(jpeg_frames)
+]
 
 # Output video data as JSON for backend to capture
 video_output = {
@@ -58,5 +85,11 @@ video_output = {
     'duration': len(frames) / fps
 }
 
-print(f"VIDEO_OUTPUT:{json.dumps(video_output)}")
+# Write the payload as bytes straight to stdout rather than formatting one more
+# multi-MB str around it; still one line, as the executor matches VIDEO_OUTPUT:(.+)
+sys.stdout.flush()
+sys.stdout.buffer.write(b"VIDEO_OUTPUT:")
+sys.stdout.buffer.write(orjson.dumps(video_output))
+sys.stdout.buffer.write(b"\n")
+sys.stdout.buffer.flush()
 print(f"Test video complete! Generated {len(frames)} frames for video playback.")